@@ -1,18 +1,41 @@
 # clip_acquisition.py
 
 import os
-import uuid
+import re
+import atexit
+import base64
+import secrets
+import sys
 import json
-import requests
 from datetime import datetime
 import logging
-from typing import List, Dict, Optional, BinaryIO
+from typing import List, Dict, Optional, BinaryIO, Tuple
+import io
 import shutil
 import ssl
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import certifi
-from pytube import YouTube
 from yt_dlp import YoutubeDL
 
+try:
+    from pytube import YouTube
+except ImportError:
+    YouTube = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -22,15 +45,52 @@ logger = logging.getLogger('clip_acquisition')
 
 # Constants
 CLIP_STORAGE_DIR = "clip_storage"
-METADATA_FILE = "clips_metadata.json"
+METADATA_FILE = "clips_metadata.jsonl"
+LEGACY_METADATA_FILE = "clips_metadata.json"
+MAX_DOWNLOAD_WORKERS = 8
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB copy buffer for uploaded clips
+FSYNC_INTERVAL_MS = 50  # Group-commit window for metadata writes
+
+# Download tuning shared by all yt-dlp calls: large write buffers and HTTP
+# chunks cut syscalls on the output file, and DASH fragments are fetched
+# in parallel
+YDL_DOWNLOAD_OPTIONS = {
+    'buffersize': 1 << 20,
+    'http_chunk_size': 10 << 20,
+    'retries': 3,
+    'concurrent_fragment_downloads': 4,
+}
+
+# A tiny valid MP4 file (just an ftyp box) written for dummy clips
+_MINIMAL_MP4 = base64.b64decode("AAAAHGZ0eXBtcDQyAAAAAG1wNDJtcDQxaXNvbWlzbwAAAAA=")
+
+# Extracts the 11-character video ID from watch, youtu.be, shorts and embed URLs
+_YT_ID_RE = re.compile(r'(?:v=|youtu\.be/|shorts/|embed/)([\w-]{11})')
+
+# In-memory metadata cache, replayed from and appended to the metadata log
+_METADATA: Optional[Dict] = None
+_CLIP_INDEX: Dict[str, Dict] = {}
+_CLIP_POSITIONS: Dict[str, int] = {}  # Clip ID -> position in _METADATA["clips"]
+_SOURCE_INDEX: Dict[Tuple[str, str], Dict] = {}  # (source, source_id) -> real downloads
+_UNPROCESSED: Dict[str, Dict] = {}  # Unprocessed clips by ID, in insertion order
+_LOG_INODE: Optional[int] = None
+_LOG_OFFSET = 0
+_LOG_EVENTS = 0
+_METADATA_VERSION = 0  # Bumped on every change to the cached metadata
+_PENDING_CHANGES: List[tuple] = []
+_FLUSH_EVENT = threading.Event()
+_WRITER_THREAD: Optional[threading.Thread] = None
+_METADATA_LOCK = threading.RLock()
+_JOURNAL_LOCK_DEPTH = 0
 
 # Ensure directories exist
 os.makedirs(CLIP_STORAGE_DIR, exist_ok=True)
 
-# Initialize metadata file if it doesn't exist
-if not os.path.exists(os.path.join(CLIP_STORAGE_DIR, METADATA_FILE)):
-    with open(os.path.join(CLIP_STORAGE_DIR, METADATA_FILE), 'w') as f:
-        json.dump({"clips": []}, f)
+# Metadata paths, joined once rather than on every read and write
+_METADATA_PATH = os.path.join(CLIP_STORAGE_DIR, METADATA_FILE)
+_METADATA_LOCK_PATH = f"{_METADATA_PATH}.lock"
+_METADATA_TMP_PATH = f"{_METADATA_PATH}.tmp"
+_LEGACY_METADATA_PATH = os.path.join(CLIP_STORAGE_DIR, LEGACY_METADATA_FILE)
 
 
 # Fix for SSL certificate issues
@@ -40,6 +100,8 @@ def fix_ssl_certificate():
         # Try to use certifi for certificate verification
         ssl_context = ssl.create_default_context(cafile=certifi.where())
         ssl._create_default_https_context = lambda: ssl_context
+        # Contexts built by yt-dlp load default verify paths, which honour this
+        os.environ.setdefault("SSL_CERT_FILE", certifi.where())
         logger.info("SSL certificate configured with certifi")
     except Exception as e:
         # If certifi fails, disable verification (not recommended for production)
@@ -48,55 +110,374 @@ def fix_ssl_certificate():
         ssl._create_default_https_context = ssl._create_unverified_context
 
 
-# Call this at module import time
-fix_ssl_certificate()
+_SSL_FIXED = False
+_SSL_FIX_LOCK = threading.Lock()
 
 
-def load_metadata() -> Dict:
-    """Load the clips metadata file"""
+def _is_cert_error(error: BaseException) -> bool:
+    """Check whether an error was caused by failed certificate verification"""
+    while error is not None:
+        if isinstance(error, ssl.SSLCertVerificationError) or "CERTIFICATE_VERIFY_FAILED" in str(error):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _ydl_download(ydl_opts: Dict, video_url: str) -> None:
+    """
+    Run a yt-dlp download, applying the certifi SSL fix and retrying once
+    if the first attempt fails certificate verification
+    """
+    global _SSL_FIXED
     try:
-        with open(os.path.join(CLIP_STORAGE_DIR, METADATA_FILE), 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        # If file is empty or doesn't exist, return empty metadata
-        return {"clips": []}
+        with YoutubeDL(ydl_opts) as ydl:
+            ydl.download([video_url])
+    except Exception as e:
+        if _SSL_FIXED or not _is_cert_error(e):
+            raise
+        with _SSL_FIX_LOCK:
+            if not _SSL_FIXED:
+                fix_ssl_certificate()
+                _SSL_FIXED = True
+        logger.info(f"Retrying download after SSL certificate fix: {video_url}")
+        with YoutubeDL(ydl_opts) as ydl:
+            ydl.download([video_url])
+
+
+@contextmanager
+def _journal_lock():
+    """
+    Serialize metadata file updates across threads and processes
+    
+    Holds the in-process lock plus an advisory lock on a sidecar lockfile,
+    so a load-modify-save cycle in one process (e.g. the API server) cannot
+    interleave with another (e.g. the Streamlit app or CLI). Re-entrant
+    within a thread.
+    """
+    global _JOURNAL_LOCK_DEPTH
+    with _METADATA_LOCK:
+        if _JOURNAL_LOCK_DEPTH:
+            _JOURNAL_LOCK_DEPTH += 1
+            try:
+                yield
+            finally:
+                _JOURNAL_LOCK_DEPTH -= 1
+            return
+
+        with open(_METADATA_LOCK_PATH, 'a+b') as lock_file:
+            if sys.platform == "win32":
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            _JOURNAL_LOCK_DEPTH = 1
+            try:
+                yield
+            finally:
+                _JOURNAL_LOCK_DEPTH = 0
+                if sys.platform == "win32":
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _encode_log_record(kind: str, payload: Dict) -> bytes:
+    """Serialize a metadata change as a single log line"""
+    record = {"op": kind, "data": payload}
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(record) + "\n").encode('utf-8')
+
+
+def _decode_log_record(line: bytes) -> tuple:
+    """Parse a metadata log line back into a (kind, payload) change"""
+    record = orjson.loads(line) if orjson is not None else json.loads(line)
+    return record["op"], record["data"]
+
+
+def _reset_metadata(inode: Optional[int]) -> None:
+    """Start an empty metadata cache for the log file with the given inode"""
+    global _METADATA, _CLIP_INDEX, _CLIP_POSITIONS, _SOURCE_INDEX, _UNPROCESSED, _LOG_INODE, _LOG_OFFSET
+    global _LOG_EVENTS, _METADATA_VERSION
+    _METADATA = {"clips": []}
+    _CLIP_INDEX = {}
+    _CLIP_POSITIONS = {}
+    _SOURCE_INDEX = {}
+    _UNPROCESSED = {}
+    _LOG_INODE = inode
+    _LOG_OFFSET = 0
+    _LOG_EVENTS = 0
+    _METADATA_VERSION += 1
+
+
+def _apply_change(change: tuple) -> None:
+    """Apply a single metadata change to the cached metadata and index"""
+    global _METADATA_VERSION
+    _METADATA_VERSION += 1
+    kind, payload = change
+    if kind == "upsert":
+        clip_id = payload["clip_id"]
+        clips = _METADATA["clips"]
+        position = _CLIP_POSITIONS.get(clip_id)
+        if position is None:
+            _CLIP_POSITIONS[clip_id] = len(clips)
+            clips.append(payload)
+        else:
+            clips[position] = payload
+        _CLIP_INDEX[clip_id] = payload
+        source_key = (payload.get("source"), payload.get("source_id"))
+        if source_key[1] and source_key[1] != "unknown" and not payload.get("placeholder"):
+            _SOURCE_INDEX[source_key] = payload
+        if payload.get("processed", False):
+            _UNPROCESSED.pop(clip_id, None)
+        else:
+            _UNPROCESSED[clip_id] = payload
+    elif kind == "processed":
+        clip = _CLIP_INDEX.get(payload["clip_id"])
+        if clip is not None:
+            clip["processed"] = True
+            clip["processed_at"] = payload["processed_at"]
+            _UNPROCESSED.pop(payload["clip_id"], None)
+
+
+def _sync_metadata() -> None:
+    """
+    Bring the cached metadata up to date with the log on disk
+    
+    Only log lines appended since the last sync are read. If the log was
+    replaced (compacted) by another process it is replayed from the start,
+    and any local changes not yet flushed are re-applied on top.
+    """
+    global _LOG_OFFSET, _LOG_EVENTS
+    try:
+        stat = os.stat(_METADATA_PATH)
+    except FileNotFoundError:
+        if _METADATA is None:
+            _reset_metadata(None)
+        return
+
+    replaced = _METADATA is None or stat.st_ino != _LOG_INODE or stat.st_size < _LOG_OFFSET
+    if replaced:
+        _reset_metadata(stat.st_ino)
+    if stat.st_size > _LOG_OFFSET:
+        with open(_METADATA_PATH, 'rb') as f:
+            f.seek(_LOG_OFFSET)
+            data = f.read(stat.st_size - _LOG_OFFSET)
+        # Ignore a trailing partial line that is still being written
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].splitlines():
+            if not line.strip():
+                continue
+            try:
+                _apply_change(_decode_log_record(line))
+            except (ValueError, KeyError):
+                logger.warning("Skipping corrupt line in clip metadata log")
+                continue
+            _LOG_EVENTS += 1
+        _LOG_OFFSET += complete
+    if replaced:
+        for change in _PENDING_CHANGES:
+            _apply_change(change)
+
+
+def load_metadata() -> Dict:
+    """
+    Load the clips metadata
+    
+    The metadata is cached in memory and kept in sync with the append-only
+    log on disk, so only changes made by other processes are read. Callers
+    get copies of the clip records; save changes with add_clip_metadata.
+    """
+    with _METADATA_LOCK:
+        _sync_metadata()
+        return {"clips": [dict(clip) for clip in _METADATA["clips"]]}
 
 
 def save_metadata(metadata: Dict) -> None:
-    """Save the clips metadata file"""
-    with open(os.path.join(CLIP_STORAGE_DIR, METADATA_FILE), 'w') as f:
-        json.dump(metadata, f, indent=2)
+    """Rewrite the metadata log as one record per clip, atomically"""
+    global _LOG_OFFSET, _LOG_EVENTS
+    with _journal_lock():
+        with open(_METADATA_TMP_PATH, 'wb') as f:
+            for clip in metadata["clips"]:
+                f.write(_encode_log_record("upsert", clip))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(_METADATA_TMP_PATH, _METADATA_PATH)
+
+        stat = os.stat(_METADATA_PATH)
+        clips = metadata["clips"]
+        _reset_metadata(stat.st_ino)
+        for clip in clips:
+            _apply_change(("upsert", clip))
+        _LOG_OFFSET = stat.st_size
+        _LOG_EVENTS = len(clips)
+        _PENDING_CHANGES.clear()
+
+
+def flush_metadata() -> None:
+    """
+    Append any pending metadata changes to the log
+    
+    Changes appended by other processes since the last sync are picked up
+    first. The log is compacted once it holds more than twice as many
+    records as there are clips. Call this directly when a change must be
+    durable before returning; otherwise the background writer commits it
+    within FSYNC_INTERVAL_MS.
+    """
+    global _LOG_OFFSET, _LOG_EVENTS
+    with _journal_lock():
+        if not _PENDING_CHANGES:
+            return
+        _sync_metadata()
+
+        payload = b"".join(_encode_log_record(kind, data) for kind, data in _PENDING_CHANGES)
+        with open(_METADATA_PATH, 'ab') as f:
+            # Writers hold the journal lock, so anything past the synced offset is
+            # a torn line from a crashed writer; drop it rather than extend it
+            if os.fstat(f.fileno()).st_size > _LOG_OFFSET:
+                logger.warning("Truncating partial line at end of clip metadata log")
+                f.truncate(_LOG_OFFSET)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            _LOG_OFFSET = f.tell()
+        _LOG_EVENTS += len(_PENDING_CHANGES)
+        _PENDING_CHANGES.clear()
+
+        if _LOG_EVENTS > 2 * max(len(_METADATA["clips"]), 1):
+            save_metadata(_METADATA)
+
+
+def _metadata_writer() -> None:
+    """Background group commit: flush all changes made in each window with one fsync"""
+    while True:
+        _FLUSH_EVENT.wait()
+        time.sleep(FSYNC_INTERVAL_MS / 1000)
+        _FLUSH_EVENT.clear()
+        try:
+            flush_metadata()
+        except Exception as e:
+            logger.error(f"Error writing clip metadata: {str(e)}")
+
+
+def _record_change(kind: str, payload: Dict) -> None:
+    """Apply a metadata change to the cache and queue it for the background writer"""
+    global _WRITER_THREAD
+    with _METADATA_LOCK:
+        _sync_metadata()
+        # The cache keeps its own copy, so the caller's dict stays theirs to change
+        change = (kind, dict(payload))
+        _apply_change(change)
+        _PENDING_CHANGES.append(change)
+        if _WRITER_THREAD is None:
+            _WRITER_THREAD = threading.Thread(target=_metadata_writer, name="clip-metadata-writer",
+                                              daemon=True)
+            _WRITER_THREAD.start()
+    _FLUSH_EVENT.set()
+
+
+def _migrate_legacy_metadata() -> None:
+    """Convert a clips_metadata.json file from older versions into the log"""
+    with _journal_lock():
+        if os.path.exists(_METADATA_PATH):
+            return
+        if os.path.exists(_LEGACY_METADATA_PATH):
+            try:
+                with open(_LEGACY_METADATA_PATH, 'r') as f:
+                    legacy = json.load(f)
+                save_metadata(legacy)
+                logger.info(f"Migrated {len(legacy['clips'])} clips from {_LEGACY_METADATA_PATH}")
+                return
+            except (json.JSONDecodeError, KeyError) as e:
+                logger.warning(f"Could not migrate legacy metadata file: {str(e)}")
+        open(_METADATA_PATH, 'ab').close()
+
+
+# Initialize the metadata log if it doesn't exist
+_migrate_legacy_metadata()
+
+# Make sure pending changes reach disk on interpreter shutdown
+atexit.register(flush_metadata)
+
+
+def _verify_download(output_path: str) -> None:
+    """Raise if yt-dlp did not leave a non-empty file at output_path"""
+    try:
+        size = os.path.getsize(output_path)
+    except OSError:
+        size = 0
+    if size == 0:
+        raise IOError(f"Download produced no data at {output_path}")
 
 
-def download_youtube_clip(video_url: str, title: str = None) -> Optional[Dict]:
+def _parse_youtube_url(video_url: str) -> Tuple[str, str]:
+    """
+    Normalize a YouTube URL or bare video ID
+    
+    Args:
+        video_url: YouTube video URL or ID
+        
+    Returns:
+        Tuple of (video_id, video_url); video_id is "unknown" if it cannot be parsed
+    """
+    if "youtube.com" not in video_url and "youtu.be" not in video_url:
+        # Assume it's just the video ID
+        return video_url, f"https://www.youtube.com/watch?v={video_url}"
+    
+    match = _YT_ID_RE.search(video_url)
+    return (match.group(1) if match else "unknown"), video_url
+
+
+def find_clip_by_source(source: str, source_id: str) -> Optional[Dict]:
+    """
+    Find a previously downloaded clip by its source and source ID
+    
+    Args:
+        source: Clip source, e.g. "youtube"
+        source_id: ID of the clip at the source
+        
+    Returns:
+        Clip metadata dictionary or None if not downloaded or the file is gone
+    """
+    with _METADATA_LOCK:
+        _sync_metadata()
+        clip = _SOURCE_INDEX.get((source, source_id))
+        clip = dict(clip) if clip is not None else None
+    if clip is not None and os.path.exists(clip["local_path"]):
+        return clip
+    return None
+
+
+def download_youtube_clip(video_url: str, title: str = None, force: bool = False) -> Optional[Dict]:
     """
     Download an NBA clip from YouTube
     
     Args:
         video_url: YouTube video URL or ID
         title: Optional title for the clip
+        force: Download again even if this video was already downloaded
         
     Returns:
         Clip metadata dictionary or None if failed
     """
     try:
-        # Try to import pytube, if not available use a fallback
-        try:
-            from pytube import YouTube
-        except ImportError:
+        # If pytube is not available use a fallback
+        if YouTube is None:
             logger.warning("pytube not installed. Trying alternative method...")
             return download_youtube_clip_fallback(video_url, title)
         
         # Handle different formats of YouTube URLs
-        if "youtube.com" not in video_url and "youtu.be" not in video_url:
-            # Assume it's just the video ID
-            video_url = f"https://www.youtube.com/watch?v={video_url}"
+        video_id, video_url = _parse_youtube_url(video_url)
         
-        logger.info(f"Downloading YouTube clip: {video_url}")
+        if not force and (existing := find_clip_by_source("youtube", video_id)):
+            logger.info(f"Reusing clip {existing['clip_id']} for {video_url}")
+            return existing
         
+        logger.info(f"Downloading YouTube clip: {video_url}")
         
         # Generate clip ID
-        clip_id = f"yt_{uuid.uuid4().hex[:8]}"
+        clip_id = f"yt_{secrets.token_hex(4)}"
         
         # Set output path
         output_path = os.path.join(CLIP_STORAGE_DIR, f"{clip_id}.mp4")
@@ -107,16 +488,16 @@ def download_youtube_clip(video_url: str, title: str = None) -> Optional[Dict]:
             'noplaylist': True,                                    # ignore playlists
             'quiet': False,
             'no_warnings': True,
+            **YDL_DOWNLOAD_OPTIONS,
             }
 
-        with YoutubeDL(ydl_opts) as ydl:
-            ydl.download([video_url])
-            download_success = True
+        _ydl_download(ydl_opts, video_url)
+        _verify_download(output_path)
         # Create metadata
         clip_metadata = {
             "clip_id": clip_id,
             "source": "youtube",
-            "source_id": video_url.split("v=")[1].split("&")[0],
+            "source_id": video_id,
             "local_path": output_path,
             "original_url": video_url,
             "acquired_at": datetime.now().isoformat(),
@@ -150,21 +531,10 @@ def download_youtube_clip_fallback(video_url: str, title: str = None) -> Optiona
     """
     try:
         # Handle different formats of YouTube URLs
-        if "youtube.com" not in video_url and "youtu.be" not in video_url:
-            # Assume it's just the video ID
-            video_id = video_url
-            video_url = f"https://www.youtube.com/watch?v={video_id}"
-        else:
-            # Extract video ID from URL
-            if "youtube.com" in video_url:
-                video_id = video_url.split("v=")[1].split("&")[0]
-            elif "youtu.be" in video_url:
-                video_id = video_url.split("/")[-1].split("?")[0]
-            else:
-                video_id = "unknown"
+        video_id, video_url = _parse_youtube_url(video_url)
         
         # Generate clip ID
-        clip_id = f"yt_{uuid.uuid4().hex[:8]}"
+        clip_id = f"yt_{secrets.token_hex(4)}"
         
         # Set output path
         output_path = os.path.join(CLIP_STORAGE_DIR, f"{clip_id}.mp4")
@@ -177,11 +547,12 @@ def download_youtube_clip_fallback(video_url: str, title: str = None) -> Optiona
             'noplaylist': True,                                    # ignore playlists
             'quiet': False,
             'no_warnings': True,
+            **YDL_DOWNLOAD_OPTIONS,
             }
 
-            with YoutubeDL(ydl_opts) as ydl:
-                ydl.download([video_url])
-                download_success = True
+            _ydl_download(ydl_opts, video_url)
+            _verify_download(output_path)
+            download_success = True
         except Exception as e:
             logger.error(f"Error downloading YouTube clip with youtube-dl: {str(e)}")
             download_success = False
@@ -211,7 +582,7 @@ def download_youtube_clip_fallback(video_url: str, title: str = None) -> Optiona
         
         # Last resort - create minimal placeholder
         try:
-            clip_id = f"yt_{uuid.uuid4().hex[:8]}"
+            clip_id = f"yt_{secrets.token_hex(4)}"
             output_path = os.path.join(CLIP_STORAGE_DIR, f"{clip_id}.txt")
             
             with open(output_path, 'w') as f:
@@ -237,10 +608,112 @@ def download_youtube_clip_fallback(video_url: str, title: str = None) -> Optiona
 
 
 def add_clip_metadata(clip_metadata: Dict) -> None:
-    """Add a clip's metadata to the metadata file"""
-    metadata = load_metadata()
-    metadata["clips"].append(clip_metadata)
-    save_metadata(metadata)
+    """
+    Add a clip's metadata to the metadata file
+    
+    Records are keyed by clip_id: adding a clip whose ID already exists
+    replaces the stored record in place instead of appending a duplicate.
+    """
+    _record_change("upsert", clip_metadata)
+
+
+def _source_fileno(file_object: BinaryIO) -> Optional[int]:
+    """Get the OS file descriptor backing a file-like object, if any"""
+    if isinstance(file_object, tempfile.SpooledTemporaryFile):
+        # Look at the underlying buffer: calling fileno() on the spooled
+        # file itself would force an in-memory upload out to disk first
+        file_object = file_object._file
+    try:
+        return file_object.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _copy_clip_data(file_object: BinaryIO, dest: BinaryIO) -> None:
+    """
+    Copy a file-like object into an open destination file
+    
+    In-memory sources (such as Streamlit uploads, which are BytesIO objects)
+    are written straight from their buffer without copying. On Linux,
+    sources backed by a real file are copied in-kernel with os.sendfile;
+    everything else is streamed in UPLOAD_CHUNK_SIZE chunks.
+    """
+    if isinstance(file_object, io.BytesIO):
+        offset = file_object.tell()
+        with file_object.getbuffer() as buffer:
+            dest.write(buffer[offset:])
+            file_object.seek(len(buffer))
+        return
+    
+    src_fd = _source_fileno(file_object)
+    if src_fd is not None and sys.platform.startswith("linux"):
+        offset = file_object.tell()
+        remaining = os.fstat(src_fd).st_size - offset
+        dest.flush()
+        try:
+            while remaining > 0:
+                sent = os.sendfile(dest.fileno(), src_fd, offset, remaining)
+                if sent == 0:
+                    break
+                offset += sent
+                remaining -= sent
+            file_object.seek(offset)
+            if remaining <= 0:
+                return
+        except OSError as e:
+            logger.warning(f"sendfile failed, falling back to buffered copy: {str(e)}")
+            file_object.seek(offset)
+    shutil.copyfileobj(file_object, dest, length=UPLOAD_CHUNK_SIZE)
+
+
+def create_upload_target(filename: str = None) -> Tuple[str, str]:
+    """
+    Allocate a clip ID and storage path for an uploaded clip
+    
+    Args:
+        filename: Optional original filename, used for the file extension
+        
+    Returns:
+        Tuple of (clip_id, local_path)
+    """
+    clip_id = f"upload_{secrets.token_hex(4)}"
+    
+    # Get file extension
+    if filename:
+        _, file_ext = os.path.splitext(filename)
+    else:
+        file_ext = ".mp4"  # Default extension
+    
+    return clip_id, os.path.join(CLIP_STORAGE_DIR, f"{clip_id}{file_ext}")
+
+
+def register_uploaded_clip(clip_id: str, local_path: str, filename: str = None,
+                           title: str = None) -> Dict:
+    """
+    Record metadata for an uploaded clip that is already stored on disk
+    
+    Args:
+        clip_id: Clip ID from create_upload_target
+        local_path: Path the clip data was written to
+        filename: Optional original filename
+        title: Optional title for the clip
+        
+    Returns:
+        Clip metadata dictionary
+    """
+    clip_metadata = {
+        "clip_id": clip_id,
+        "source": "upload",
+        "local_path": local_path,
+        "original_filename": filename,
+        "acquired_at": datetime.now().isoformat(),
+        "title": title or filename or f"Uploaded clip {clip_id}",
+        "processed": False
+    }
+    
+    # Add to metadata file
+    add_clip_metadata(clip_metadata)
+    return clip_metadata
 
 
 def save_uploaded_clip(file_object: BinaryIO, filename: str = None, title: str = None) -> Optional[Dict]:
@@ -256,41 +729,20 @@ def save_uploaded_clip(file_object: BinaryIO, filename: str = None, title: str =
         Clip metadata dictionary or None if failed
     """
     try:
-        clip_id = f"upload_{uuid.uuid4().hex[:8]}"
-        
-        # Get file extension
-        if filename:
-            _, file_ext = os.path.splitext(filename)
-        else:
-            file_ext = ".mp4"  # Default extension
-        
-        # Save file
-        local_path = os.path.join(CLIP_STORAGE_DIR, f"{clip_id}{file_ext}")
+        clip_id, local_path = create_upload_target(filename)
         
         # Write file data to disk
-        with open(local_path, 'wb') as f:
-            # If file_object is a file-like object, use copyfileobj
+        with open(local_path, 'wb', buffering=UPLOAD_CHUNK_SIZE) as f:
+            # If file_object is a file-like object, stream it in large chunks
             if hasattr(file_object, 'read'):
-                shutil.copyfileobj(file_object, f)
+                _copy_clip_data(file_object, f)
             # If it's bytes, write directly
-            elif isinstance(file_object, bytes):
+            elif isinstance(file_object, (bytes, bytearray, memoryview)):
                 f.write(file_object)
             else:
                 raise TypeError("file_object must be a file-like object or bytes")
         
-        # Create metadata
-        clip_metadata = {
-            "clip_id": clip_id,
-            "source": "upload",
-            "local_path": local_path,
-            "original_filename": filename,
-            "acquired_at": datetime.now().isoformat(),
-            "title": title or filename or f"Uploaded clip {clip_id}",
-            "processed": False
-        }
-        
-        # Add to metadata file
-        add_clip_metadata(clip_metadata)
+        clip_metadata = register_uploaded_clip(clip_id, local_path, filename, title)
         
         logger.info(f"Successfully saved uploaded clip {clip_id}")
         return clip_metadata
@@ -302,33 +754,63 @@ def save_uploaded_clip(file_object: BinaryIO, filename: str = None, title: str =
 
 def get_all_clips() -> List[Dict]:
     """Get metadata for all clips"""
-    metadata = load_metadata()
-    return metadata["clips"]
+    return load_metadata()["clips"]
+
+
+def get_metadata_version() -> int:
+    """
+    Get a counter that changes whenever the clip metadata does
+    
+    Unlike the metadata file's mtime, this also reflects changes that the
+    background writer hasn't flushed yet, so it is safe to key caches on.
+    """
+    with _METADATA_LOCK:
+        _sync_metadata()
+        return _METADATA_VERSION
 
 
 def get_clip_by_id(clip_id: str) -> Optional[Dict]:
     """Get metadata for a specific clip by ID"""
-    metadata = load_metadata()
-    for clip in metadata["clips"]:
-        if clip["clip_id"] == clip_id:
-            return clip
-    return None
+    with _METADATA_LOCK:
+        _sync_metadata()
+        clip = _CLIP_INDEX.get(clip_id)
+        return dict(clip) if clip is not None else None
 
 
 def mark_clip_as_processed(clip_id: str) -> None:
     """Mark a clip as processed in the metadata"""
-    metadata = load_metadata()
-    for clip in metadata["clips"]:
-        if clip["clip_id"] == clip_id:
-            clip["processed"] = True
-            clip["processed_at"] = datetime.now().isoformat()
-    save_metadata(metadata)
+    with _METADATA_LOCK:
+        _sync_metadata()
+        if clip_id not in _CLIP_INDEX:
+            return
+        _record_change("processed", {
+            "clip_id": clip_id,
+            "processed_at": datetime.now().isoformat()
+        })
 
 
 def get_unprocessed_clips() -> List[Dict]:
     """Get metadata for all unprocessed clips"""
-    metadata = load_metadata()
-    return [clip for clip in metadata["clips"] if not clip.get("processed", False)]
+    with _METADATA_LOCK:
+        _sync_metadata()
+        return [dict(clip) for clip in _UNPROCESSED.values()]
+
+
+_STORAGE_CLIENT = None
+
+
+def _get_storage_client():
+    """
+    Get the shared Google Cloud Storage client
+    
+    The client owns a pooled HTTP session, so reusing it keeps connections
+    alive across uploads instead of paying a new TCP+TLS handshake each time.
+    """
+    global _STORAGE_CLIENT
+    if _STORAGE_CLIENT is None:
+        from google.cloud import storage
+        _STORAGE_CLIENT = storage.Client()
+    return _STORAGE_CLIENT
 
 
 def upload_to_cloud_storage(local_path: str, destination_path: str, 
@@ -347,8 +829,7 @@ def upload_to_cloud_storage(local_path: str, destination_path: str,
     try:
         # For Google Cloud Storage:
         try:
-            from google.cloud import storage
-            storage_client = storage.Client()
+            storage_client = _get_storage_client()
             bucket = storage_client.bucket(bucket_name)
             blob = bucket.blob(destination_path)
             blob.upload_from_filename(local_path)
@@ -388,16 +869,14 @@ def fetch_nba_highlights(number_of_clips: int = 5) -> List[Dict]:
         # Limit to requested number
         urls_to_fetch = nba_highlights[:min(number_of_clips, len(nba_highlights))]
         
-        # Download each clip
+        # Download clips concurrently; each download is network bound
         downloaded_clips = []
-        for url in urls_to_fetch:
-            clip = download_youtube_clip(url)
-            if clip:
-                downloaded_clips.append(clip)
-            
-            # Small delay to avoid rate limiting
-            import time
-            time.sleep(2)
+        if urls_to_fetch:
+            max_workers = min(MAX_DOWNLOAD_WORKERS, len(urls_to_fetch))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for clip in executor.map(download_youtube_clip, urls_to_fetch):
+                    if clip:
+                        downloaded_clips.append(clip)
         
         # If we didn't get enough clips, add dummy clips
         while len(downloaded_clips) < number_of_clips:
@@ -424,21 +903,14 @@ def create_dummy_clip(title: str = "Dummy NBA Highlight") -> Dict:
     Returns:
         Clip metadata dictionary
     """
-    clip_id = f"dummy_{uuid.uuid4().hex[:8]}"
+    clip_id = f"dummy_{secrets.token_hex(4)}"
     local_path = os.path.join(CLIP_STORAGE_DIR, f"{clip_id}.mp4")  # Using .mp4 for compatibility
     
     # Create a dummy mp4 file with minimal content
     try:
         # Try to create a minimal valid mp4 file
-        from base64 import b64decode
-        
-        # This is a tiny valid MP4 file (a few bytes)
-        minimal_mp4 = b64decode(
-            "AAAAHGZ0eXBtcDQyAAAAAG1wNDJtcDQxaXNvbWlzbwAAAAA="
-        )
-        
         with open(local_path, 'wb') as f:
-            f.write(minimal_mp4)
+            f.write(_MINIMAL_MP4)
     except Exception:
         # If that fails, just create a text file
         with open(local_path, 'w') as f:
@@ -1,11 +1,18 @@
 # clip_api.py
 
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 from clip_manager import ClipManager
+import asyncio
 import logging
+import os
+
+try:
+    import aiofiles
+except ImportError:
+    aiofiles = None
 
 # Set up logging
 logging.basicConfig(
@@ -16,10 +23,14 @@ logger = logging.getLogger('clip_api')
 
 app = FastAPI(title="NBA Clip Acquisition API")
 
+UPLOAD_CHUNK_SIZE = 1 << 20  # Read uploads in 1 MiB chunks
+
 # Models
 class ClipResponse(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
     clip_id: str
-    title: str
+    title: Optional[str] = None
     source: str
     acquired_at: str
     processed: bool
@@ -32,12 +43,34 @@ class YouTubeRequest(BaseModel):
 class HighlightsRequest(BaseModel):
     count: Optional[int] = 5
 
+_CLIP_RESPONSE_FIELDS = tuple(ClipResponse.model_fields)
+
+def _clip_list_response(clips: List[dict]) -> ORJSONResponse:
+    """Serialize stored clips with orjson, skipping per-row model validation"""
+    return ORJSONResponse([{field: clip.get(field) for field in _CLIP_RESPONSE_FIELDS}
+                           for clip in clips])
+
+async def _stream_upload(file: UploadFile, title: Optional[str]) -> dict:
+    """Stream an uploaded file to clip storage without blocking the event loop"""
+    clip_id, local_path = ClipManager.create_upload_target(file.filename)
+    try:
+        async with aiofiles.open(local_path, 'wb') as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await out.write(chunk)
+        return await asyncio.to_thread(ClipManager.register_upload, clip_id, local_path,
+                                       file.filename, title)
+    except Exception:
+        # Don't leave a file behind that no metadata entry points to
+        if os.path.exists(local_path):
+            os.remove(local_path)
+        raise
+
 # Routes
 @app.post("/clips/youtube", response_model=ClipResponse)
 async def download_youtube_clip(request: YouTubeRequest):
     """Download a clip from YouTube"""
     try:
-        clip = ClipManager.download_youtube_clip(request.url, request.title)
+        clip = await asyncio.to_thread(ClipManager.download_youtube_clip, request.url, request.title)
         if not clip:
             raise HTTPException(status_code=500, detail=f"Failed to download YouTube clip {request.url}")
         return clip
@@ -49,7 +82,7 @@ async def download_youtube_clip(request: YouTubeRequest):
 async def fetch_highlights(request: HighlightsRequest):
     """Fetch NBA highlight clips"""
     try:
-        clips = ClipManager.fetch_nba_highlights(request.count)
+        clips = await asyncio.to_thread(ClipManager.fetch_nba_highlights, request.count)
         if not clips:
             raise HTTPException(status_code=404, detail="No highlight clips found")
         return clips
@@ -64,7 +97,10 @@ async def upload_clip(
 ):
     """Upload a clip file"""
     try:
-        clip = ClipManager.upload_clip(file.file, file.filename, title)
+        if aiofiles is not None:
+            clip = await _stream_upload(file, title)
+        else:
+            clip = await asyncio.to_thread(ClipManager.upload_clip, file.file, file.filename, title)
         if not clip:
             raise HTTPException(status_code=500, detail="Failed to save uploaded clip")
         return clip
@@ -72,15 +108,24 @@ async def upload_clip(
         logger.error(f"Error uploading clip: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/clips", response_model=List[ClipResponse])
+@app.get("/clips", response_model=List[ClipResponse], response_class=ORJSONResponse)
 async def get_all_clips():
     """Get all clips"""
     try:
-        return ClipManager.get_all_clips()
+        return _clip_list_response(ClipManager.get_all_clips())
     except Exception as e:
         logger.error(f"Error getting all clips: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/clips/unprocessed", response_model=List[ClipResponse], response_class=ORJSONResponse)
+async def get_unprocessed_clips():
+    """Get all unprocessed clips"""
+    try:
+        return _clip_list_response(ClipManager.get_unprocessed_clips())
+    except Exception as e:
+        logger.error(f"Error getting unprocessed clips: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/clips/{clip_id}", response_model=ClipResponse)
 async def get_clip(clip_id: str):
     """Get a specific clip by ID"""
@@ -93,20 +138,11 @@ async def get_clip(clip_id: str):
         logger.error(f"Error getting clip: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/clips/unprocessed", response_model=List[ClipResponse])
-async def get_unprocessed_clips():
-    """Get all unprocessed clips"""
-    try:
-        return ClipManager.get_unprocessed_clips()
-    except Exception as e:
-        logger.error(f"Error getting unprocessed clips: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
 @app.post("/clips/{clip_id}/mark-processed")
 async def mark_clip_processed(clip_id: str):
     """Mark a clip as processed"""
     try:
-        ClipManager.mark_processed(clip_id)
+        await asyncio.to_thread(ClipManager.mark_processed, clip_id)
         return {"status": "success", "message": f"Clip {clip_id} marked as processed"}
     except Exception as e:
         logger.error(f"Error marking clip as processed: {str(e)}")
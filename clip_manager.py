@@ -1,9 +1,10 @@
 # clip_manager.py
 
-from typing import List, Dict, Optional, BinaryIO
+from typing import List, Dict, Optional, BinaryIO, Tuple
 from clip_acquisition import (
     download_youtube_clip, fetch_nba_highlights, save_uploaded_clip,
-    get_all_clips, get_clip_by_id, mark_clip_as_processed,
+    create_upload_target, register_uploaded_clip, add_clip_metadata, get_all_clips,
+    get_metadata_version, get_clip_by_id, mark_clip_as_processed,
     get_unprocessed_clips, upload_to_cloud_storage
 )
 
@@ -13,9 +14,9 @@ class ClipManager:
     """
     
     @staticmethod
-    def download_youtube_clip(video_url: str, title: str = None) -> Optional[Dict]:
-        """Download an NBA clip from YouTube"""
-        return download_youtube_clip(video_url, title)
+    def download_youtube_clip(video_url: str, title: str = None, force: bool = False) -> Optional[Dict]:
+        """Download an NBA clip from YouTube, reusing an earlier download unless forced"""
+        return download_youtube_clip(video_url, title, force)
     
     @staticmethod
     def fetch_nba_highlights(count: int = 5) -> List[Dict]:
@@ -28,11 +29,37 @@ class ClipManager:
         """Upload a clip file"""
         return save_uploaded_clip(file_data, filename, title)
     
+    @staticmethod
+    def create_upload_target(filename: str = None) -> Tuple[str, str]:
+        """Allocate a clip ID and storage path for an upload"""
+        return create_upload_target(filename)
+    
+    @staticmethod
+    def register_upload(clip_id: str, local_path: str, filename: str = None,
+                        title: str = None) -> Dict:
+        """Record metadata for an upload already written to disk"""
+        return register_uploaded_clip(clip_id, local_path, filename, title)
+    
+    @staticmethod
+    def register_sample(clip_metadata: Dict) -> None:
+        """Record metadata for a sample clip created by the app"""
+        add_clip_metadata(clip_metadata)
+    
+    @staticmethod
+    def update_clip(clip_metadata: Dict) -> None:
+        """Save changes to a clip's metadata, replacing the stored record"""
+        add_clip_metadata(clip_metadata)
+    
     @staticmethod
     def get_all_clips() -> List[Dict]:
         """Get all clips"""
         return get_all_clips()
     
+    @staticmethod
+    def get_metadata_version() -> int:
+        """Get a counter that changes whenever the clip metadata does"""
+        return get_metadata_version()
+    
     @staticmethod
     def get_clip(clip_id: str) -> Optional[Dict]:
         """Get a specific clip by ID"""
@@ -1,15 +1,51 @@
 # clip_processor.py
 
 import os
+import re
 import json
-import subprocess
+import asyncio
+import atexit
+import functools
+import hashlib
+import mmap
+import threading
+from dataclasses import dataclass
 import logging
+import shutil
+import subprocess
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from tenacity import (before_sleep_log, retry, retry_if_exception_type,
+                      stop_after_attempt, wait_exponential)
 import base64
 import requests
 import time
+from gemini_batch import batch_request_line, delete_batch_files, file_part, get_bucket, run_batch_job
+
+try:
+    import av
+except ImportError:
+    av = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+# SIMD base64 encoder when pybase64 is installed
+_b64encode = pybase64.b64encode if pybase64 is not None else base64.b64encode
 
 # Set up logging
 logging.basicConfig(
@@ -20,7 +56,71 @@ logger = logging.getLogger('clip_processor')
 
 # Constants
 PROCESSED_DIR = "processed_clips"
+TRANSCRIPT_CACHE_DIR = os.path.join(PROCESSED_DIR, "_by_hash")  # Transcripts by clip content hash
+TRANSCODE_DIR = os.path.join(PROCESSED_DIR, "_transcoded")  # Downscaled clips by content hash
+TRANSCODE_THRESHOLD_MB = 10  # Clips above this are downscaled before upload
+TRANSCODE_TIMEOUT = 600  # Seconds before giving up on a transcode and uploading the original
+GEMINI_MODEL = "gemini-2.0-flash"
+GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "8"))  # Concurrent clips per batch
+GEMINI_MAX_FILE_MB = 2048  # Files API upload limit
+FILE_POLL_INTERVAL = 2  # Seconds between Files API state checks
+FILE_PROCESSING_TIMEOUT = 300  # Seconds to wait for an upload to become active
+BASE64_READ_SIZE = 57 * 1024  # Multiple of 3, so chunks encode without padding
+DEBUG = os.environ.get("CLIP_PROCESSOR_DEBUG") == "1"  # Pretty-print result files
+RESULT_WRITE_BUFFER = 1 << 20
+BATCH_JSONL_PATH = os.path.join(PROCESSED_DIR, "batch.jsonl")  # One result record per line for batch runs
+INDIVIDUAL_FILES = os.environ.get("INDIVIDUAL_FILES", "1") != "0"  # Also write processed_data.json in batch runs
+
 os.makedirs(PROCESSED_DIR, exist_ok=True)
+os.makedirs(TRANSCRIPT_CACHE_DIR, exist_ok=True)
+os.makedirs(TRANSCODE_DIR, exist_ok=True)
+
+# Transcription prompt shared by the interactive and batch paths
+TRANSCRIPTION_PROMPT = """
+You are a basketball analyst. Analyze this basketball video clip and provide:
+1. A detailed transcript of what's happening in the clip, including any commentary.
+2. Give me a play by play transcription for the entire video.
+
+Format your response as valid JSON with this structure:
+{
+    "transcript": "Full transcript of the entire clip",
+    "segments": [
+        {
+            "start_time": 0.0,
+            "end_time": 5.2,
+            "text": "Description of what happens in this segment"
+        },
+        ...more segments...
+    ],
+    "players_mentioned": ["Player1", "Player2", ...],
+    "key_events": [
+        {
+            "time": 12.5,
+            "event": "Brief description of key event (shot, pass, etc.)"
+        },
+        ...more events...
+    ]
+}
+
+Use real player names if you can identify them. For timestamps, use seconds.
+Include only the JSON in your response, nothing else.
+"""
+
+# Video mimetypes by file extension
+_MIME = {
+    '.mp4': 'video/mp4',
+    '.mov': 'video/quicktime',
+    '.avi': 'video/x-msvideo',
+}
+
+# Matches a markdown code fence around the JSON in a response. Responses are
+# requested in JSON mode, so this is only a fallback for fenced output.
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.S)
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Ask Gemini for bare JSON so responses need no fence stripping
+GENERATION_CONFIG = {"response_mime_type": "application/json"}
 
 # Configure Gemini API
 def setup_gemini_api(api_key: str = None):
@@ -41,10 +141,40 @@ def setup_gemini_api(api_key: str = None):
     return True
 
 
+def _iter_video_base64(video_path: str) -> Iterator[bytes]:
+    """Yield a video's base64 encoding in chunks, reading BASE64_READ_SIZE bytes at a time"""
+    with open(video_path, 'rb') as f:
+        while chunk := f.read(BASE64_READ_SIZE):
+            yield _b64encode(chunk)
+
+
+def write_video_base64(video_path: str, out: BinaryIO) -> bool:
+    """
+    Stream a video's base64 encoding to a file object with constant memory
+    
+    Args:
+        video_path: Path to video file
+        out: Binary file object to write the encoding to
+        
+    Returns:
+        True if the video was encoded, False otherwise
+    """
+    try:
+        for encoded_chunk in _iter_video_base64(video_path):
+            out.write(encoded_chunk)
+        return True
+    except Exception as e:
+        logger.error(f"Error encoding video: {str(e)}")
+        return False
+
+
 def encode_video_base64(video_path: str) -> Optional[str]:
     """
     Encode video file to base64 for Gemini API
     
+    Transcription uploads clips with the Files API instead; prefer
+    write_video_base64 when the encoding can be streamed.
+    
     Args:
         video_path: Path to video file
         
@@ -52,27 +182,120 @@ def encode_video_base64(video_path: str) -> Optional[str]:
         Base64 encoded video or None if failed
     """
     try:
-        if not os.path.exists(video_path):
-            logger.error(f"Video file not found: {video_path}")
-            return None
-            
         # Check if it's a text file (placeholder for dummy clips)
         if video_path.endswith('.txt'):
             logger.warning(f"Input is a text file, not a video: {video_path}")
             return None
             
-        with open(video_path, 'rb') as f:
-            video_bytes = f.read()
-            
-        encoded_video = base64.b64encode(video_bytes).decode('utf-8')
+        # Encode in chunks so the raw video is never held in memory as a whole
+        encoded_video = b"".join(_iter_video_base64(video_path)).decode('ascii')
         logger.info(f"Successfully encoded video: {video_path} ({len(encoded_video)} chars)")
         return encoded_video
         
+    except FileNotFoundError:
+        logger.error(f"Video file not found: {video_path}")
+        return None
     except Exception as e:
         logger.error(f"Error encoding video: {str(e)}")
         return None
 
 
+def _video_mimetype(video_path: str) -> str:
+    """Get video mimetype based on extension"""
+    return _MIME.get(os.path.splitext(video_path)[1].lower(), 'video/mp4')  # Default to mp4
+
+
+@dataclass(frozen=True)
+class ClipFile:
+    """A video file on disk, described by a single stat"""
+    path: str
+    size: int
+    mtime_ns: int
+    mimetype: str
+    
+    @classmethod
+    def load(cls, path: str) -> "ClipFile":
+        """Stat a video file once and capture what processing needs from it"""
+        stat = os.stat(path)
+        return cls(path, stat.st_size, stat.st_mtime_ns, _video_mimetype(path))
+
+
+@functools.lru_cache(maxsize=1024)
+def _file_digest(path: str, size: int, mtime_ns: int) -> str:
+    """Hash a file's contents with BLAKE3 (SHA-256 without blake3), cached per file version"""
+    with open(path, 'rb') as f:
+        if size == 0:
+            data = b""
+        else:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if blake3 is not None:
+                return blake3.blake3(data).hexdigest()
+            return hashlib.sha256(data).hexdigest()
+        finally:
+            if size:
+                data.close()
+
+
+def _load_cached_transcript(clip: "ClipFile") -> Tuple[str, Optional[Dict]]:
+    """
+    Look up a transcript for a clip's content
+    
+    Returns:
+        Tuple of (content digest, cached transcript or None)
+    """
+    digest = _file_digest(clip.path, clip.size, clip.mtime_ns)
+    cache_path = os.path.join(TRANSCRIPT_CACHE_DIR, f"{digest}.json")
+    try:
+        with open(cache_path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return digest, None
+    try:
+        transcript_data = _json_loads(data)
+    except ValueError:
+        logger.warning(f"Ignoring corrupt cached transcript {cache_path}")
+        return digest, None
+    logger.info(f"Using cached transcript for {clip.path}")
+    return digest, transcript_data
+
+
+def _store_cached_transcript(digest: str, transcript_data: Dict) -> None:
+    """Save a real (non-dummy) transcript under its clip's content digest, atomically"""
+    if transcript_data.get("is_dummy"):
+        return
+    cache_path = os.path.join(TRANSCRIPT_CACHE_DIR, f"{digest}.json")
+    tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+    data = orjson.dumps(transcript_data) if orjson is not None else json.dumps(transcript_data).encode('utf-8')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, cache_path)
+
+
+def _read_duration(video_path: str) -> Optional[float]:
+    """Read a video's duration from its container header with PyAV, or None if unavailable"""
+    if av is None:
+        return None
+    try:
+        with av.open(video_path) as container:
+            if container.duration is not None:
+                return container.duration / av.time_base
+    except Exception as e:
+        logger.warning(f"Could not read video duration with PyAV: {str(e)}")
+    return None
+
+
+@functools.lru_cache(maxsize=1024)
+def _probe_duration(video_path: str, size: int, mtime_ns: int) -> Optional[float]:
+    """
+    Probe a video's duration, cached in memory
+    
+    The size and mtime are part of the cache key, so a changed file is
+    probed again. Returns None if the duration could not be read.
+    """
+    return _read_duration(video_path)
+
+
 def get_video_duration(video_path: str) -> Optional[float]:
     """
     Get the duration of a video file using file size as fallback
@@ -84,166 +307,312 @@ def get_video_duration(video_path: str) -> Optional[float]:
         Duration in seconds or None if failed
     """
     try:
-        if not os.path.exists(video_path):
-            logger.error(f"Video file not found: {video_path}")
-            return None
+        # A single stat both checks the file exists and feeds the duration cache
+        clip = ClipFile.load(video_path)
             
         # Check if it's a text file (placeholder for dummy clips)
         if video_path.endswith('.txt'):
             logger.warning(f"Input is a text file, not a video: {video_path}")
             return 30.0  # Return default duration for dummy clips
         
-        # Try using FFprobe if available
-        try:
-            # Use FFprobe to get duration
-            command = [
-                'ffprobe', 
-                '-v', 'error', 
-                '-show_entries', 'format=duration', 
-                '-of', 'json', 
-                video_path
-            ]
-            
-            result = subprocess.run(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            if result.returncode == 0:
-                try:
-                    duration = float(json.loads(result.stdout)['format']['duration'])
-                    return duration
-                except (json.JSONDecodeError, KeyError):
-                    pass  # Fall through to fallback
-        except (subprocess.SubprocessError, FileNotFoundError):
-            # FFprobe not available, use file size estimation
-            pass
-            
-        # Fallback: Estimate duration based on file size
-        # Rough estimate: 1MB ~= 10 seconds of video at medium quality
-        file_size_mb = os.path.getsize(video_path) / (1024 * 1024)
-        estimated_duration = file_size_mb * 10
-        
-        # Cap at reasonable values
-        if estimated_duration < 5:
-            estimated_duration = 5
-        elif estimated_duration > 600:  # Cap at 10 minutes
-            estimated_duration = 600
-            
-        logger.warning(f"Estimated video duration from file size: {estimated_duration:.1f} seconds")
-        return estimated_duration
+        return _clip_duration(clip)
             
+    except FileNotFoundError:
+        logger.error(f"Video file not found: {video_path}")
+        return None
     except Exception as e:
         logger.error(f"Error getting video duration: {str(e)}")
         return 30.0  # Return default duration as fallback
-def transcribe_with_gemini(video_path: str) -> Optional[Dict]:
+
+
+def _clip_duration(clip: ClipFile) -> float:
+    """Get a clip's duration, estimating it from the file size if it cannot be read"""
+    # Read the container header, cached per file version
+    duration = _probe_duration(clip.path, clip.size, clip.mtime_ns)
+    if duration is not None:
+        return duration
+        
+    # Fallback: Estimate duration based on file size
+    # Rough estimate: 1MB ~= 10 seconds of video at medium quality
+    file_size_mb = clip.size / (1024 * 1024)
+    estimated_duration = file_size_mb * 10
+    
+    # Cap at reasonable values
+    if estimated_duration < 5:
+        estimated_duration = 5
+    elif estimated_duration > 600:  # Cap at 10 minutes
+        estimated_duration = 600
+        
+    logger.warning(f"Estimated video duration from file size: {estimated_duration:.1f} seconds")
+    return estimated_duration
+
+
+# Files API handles keyed by (absolute path, size, mtime_ns) so reprocessing
+# an unchanged clip skips the upload
+_UPLOADED_FILES: Dict[Tuple[str, int, int], Any] = {}
+_UPLOAD_LOCK = threading.Lock()
+
+
+def _upload_video(clip: ClipFile):
     """
-    Transcribe video using Gemini API
+    Upload a video with the Gemini Files API and wait until it is usable
     
     Args:
-        video_path: Path to video file
+        clip: Video file to upload
         
     Returns:
-        Dictionary with transcription and timestamps, or None if failed
+        Active Files API file handle
     """
+    abs_path = os.path.abspath(clip.path)
+    key = (abs_path, clip.size, clip.mtime_ns)
+    
+    with _UPLOAD_LOCK:
+        cached = _UPLOADED_FILES.get(key)
+    if cached is not None:
+        try:
+            file_ref = genai.get_file(cached.name)
+            if file_ref.state.name == "ACTIVE":
+                return file_ref
+        except Exception as e:
+            logger.warning(f"Cached Gemini file {cached.name} is no longer available: {str(e)}")
+    
+    file_ref = genai.upload_file(path=clip.path, mime_type=clip.mimetype)
+    deadline = time.monotonic() + FILE_PROCESSING_TIMEOUT
+    while file_ref.state.name == "PROCESSING":
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Gemini file {file_ref.name} still processing after {FILE_PROCESSING_TIMEOUT}s")
+        time.sleep(FILE_POLL_INTERVAL)
+        file_ref = genai.get_file(file_ref.name)
+    if file_ref.state.name != "ACTIVE":
+        raise RuntimeError(f"Gemini file processing failed for {clip.path}: {file_ref.state.name}")
+    logger.info(f"Uploaded {clip.path} to Gemini as {file_ref.name}")
+    
+    # Replace handles for older versions of the same file
+    with _UPLOAD_LOCK:
+        stale = [k for k in _UPLOADED_FILES if k[0] == abs_path and k != key]
+        stale_refs = [_UPLOADED_FILES.pop(k) for k in stale]
+        _UPLOADED_FILES[key] = file_ref
+    for stale_ref in stale_refs:
+        _delete_uploaded_file(stale_ref)
+    return file_ref
+
+
+def _delete_uploaded_file(file_ref) -> None:
+    """Delete a file from Gemini storage, ignoring failures"""
     try:
-        # Check file size
-        file_size = os.path.getsize(video_path) / (1024 * 1024)  # Size in MB
-        
-        # For large files, we'll need to send them directly without compression
-        if file_size > 10:
-            logger.warning(f"Video file is large ({file_size:.2f} MB). Sending directly to Gemini.")
-            # No compression since ffmpeg isn't available
-        
-        # Get video mimetype based on extension
-        extension = os.path.splitext(video_path)[1].lower()
-        if extension == '.mp4':
-            mimetype = 'video/mp4'
-        elif extension == '.mov':
-            mimetype = 'video/quicktime'
-        elif extension == '.avi':
-            mimetype = 'video/x-msvideo'
-        else:
-            mimetype = 'video/mp4'  # Default to mp4
+        genai.delete_file(file_ref.name)
+    except Exception as e:
+        logger.warning(f"Error deleting Gemini file {file_ref.name}: {str(e)}")
+
+
+def release_uploaded_files() -> None:
+    """Delete all cached Files API uploads from Gemini storage"""
+    with _UPLOAD_LOCK:
+        file_refs = list(_UPLOADED_FILES.values())
+        _UPLOADED_FILES.clear()
+    for file_ref in file_refs:
+        _delete_uploaded_file(file_ref)
+
+
+atexit.register(release_uploaded_files)
+
+
+_FFMPEG = shutil.which("ffmpeg")
+
+
+def _transcode_for_analysis(clip: ClipFile) -> ClipFile:
+    """
+    Downscale a large clip to 480p at 15 fps for upload
+    
+    The analysis prompt does not need full resolution, and the smaller
+    file uploads much faster. Transcodes are cached by the source clip's
+    content hash. Returns the original clip if ffmpeg is unavailable, the
+    transcode fails or times out, or it is not smaller than the original.
+    """
+    if _FFMPEG is None:
+        return clip
+    digest = _file_digest(clip.path, clip.size, clip.mtime_ns)
+    output_path = os.path.join(TRANSCODE_DIR, f"{digest}.mp4")
+    try:
+        # A cached transcode from an earlier run
+        transcoded = ClipFile.load(output_path)
+    except FileNotFoundError:
+        tmp_path = f"{output_path}.{threading.get_ident()}.tmp"
+        command = [
+            _FFMPEG, '-y', '-v', 'error',
+            '-i', clip.path,
+            '-vf', "scale=-2:'min(480,ih)',fps=15",
+            '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '28',
+            '-c:a', 'aac', '-b:a', '64k',
+            '-movflags', '+faststart',
+            '-f', 'mp4', tmp_path
+        ]
+        try:
+            result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                                    timeout=TRANSCODE_TIMEOUT)
+            error = result.stderr.strip() if result.returncode != 0 else None
+        except subprocess.TimeoutExpired:
+            error = f"timed out after {TRANSCODE_TIMEOUT}s"
+        if error is not None:
+            logger.warning(f"Could not transcode {clip.path}, uploading original: {error}")
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            return clip
+        os.replace(tmp_path, output_path)
+        transcoded = ClipFile.load(output_path)
+    if transcoded.size >= clip.size:
+        return clip
+    logger.info(f"Transcoded {clip.path} for analysis "
+                f"({clip.size / (1024 * 1024):.1f} MB -> {transcoded.size / (1024 * 1024):.1f} MB)")
+    return transcoded
+
+
+def _build_transcription_contents(clip: ClipFile) -> Optional[List]:
+    """
+    Build the multipart Gemini request for a video, uploading it with the Files API
+    
+    Args:
+        clip: Video file to transcribe
         
-        # Check if file is too large for Gemini (>10MB)
-        if file_size > 100:
-            # Gemini might struggle with this size
-            logger.warning("File may be too large for Gemini. Using a dummy transcript instead.")
-            return create_dummy_transcript()
+    Returns:
+        List of prompt and video file parts, or None if the video is too large
+    """
+    # Downscale large clips so there are fewer bytes to upload
+    if clip.size > TRANSCODE_THRESHOLD_MB * 1024 * 1024:
+        clip = _transcode_for_analysis(clip)
+    
+    # Check if file is too large for the Files API
+    if clip.size / (1024 * 1024) > GEMINI_MAX_FILE_MB:
+        logger.warning("File is too large for Gemini. Using a dummy transcript instead.")
+        return None
+    
+    # Stream the video to Gemini instead of inlining its bytes in the request
+    file_ref = _upload_video(clip)
+    
+    # Create a multipart prompt with the text and video
+    return [TRANSCRIPTION_PROMPT, file_ref]
+
+
+def _parse_transcript_text(response_text: str) -> Optional[Dict]:
+    """
+    Extract the JSON transcript from Gemini response text
+    
+    Args:
+        response_text: Text of a Gemini response
         
-        # Read video file in binary mode
-        with open(video_path, 'rb') as f:
-            video_data = f.read()
+    Returns:
+        Parsed transcript dictionary or None if the response is not valid JSON
+    """
+    try:
+        # JSON mode responses are bare JSON, so parse them directly
+        try:
+            result = _json_loads(response_text)
+        except ValueError:
+            # Check if response needs cleaning (removing markdown code block)
+            match = _FENCE_RE.search(response_text)
+            json_content = match.group(1) if match else response_text.strip()
+            result = _json_loads(json_content)
         
-        # Create a multipart Gemini model
-        model = genai.GenerativeModel('gemini-2.0-flash')
+        logger.info(f"Successfully transcribed video with Gemini API")
+        return result
         
-        # Prepare the prompt
-        prompt = """
-        You are a basketball analyst. Analyze this basketball video clip and provide:
-        1. A detailed transcript of what's happening in the clip, including any commentary.
-        2. Give me a play by play transcription for the entire video.
+    except json.JSONDecodeError as e:
+        logger.error(f"Error parsing Gemini response as JSON: {str(e)}")
+        logger.error(f"Raw response: {response_text}")
+        return None
+
+
+# Retry transient Gemini failures (rate limits, overload) with exponential backoff
+_gemini_retry = retry(
+    wait=wait_exponential(multiplier=1, max=30),
+    stop=stop_after_attempt(5),
+    retry=retry_if_exception_type((google_exceptions.ResourceExhausted,
+                                   google_exceptions.ServiceUnavailable,
+                                   google_exceptions.InternalServerError)),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_model() -> "genai.GenerativeModel":
+    """Get the shared Gemini model, so its pooled client connections are reused across clips"""
+    return genai.GenerativeModel(GEMINI_MODEL, generation_config=GENERATION_CONFIG)
+
+
+def _chunk_text(chunk) -> str:
+    """Get the text of a streamed response chunk; chunks without text parts yield nothing"""
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+@_gemini_retry
+def _generate_text(contents: List) -> str:
+    """Call Gemini with retries, streaming the response and returning its full text"""
+    response = _get_model().generate_content(contents, stream=True)
+    return "".join(_chunk_text(chunk) for chunk in response)
+
+
+async def _generate_text_async(contents: List) -> str:
+    """
+    Call Gemini with retries from a thread, streaming the response and returning its full text
+    
+    generate_content_async would bind the shared model's gRPC client to the
+    event loop of the first batch, and each asyncio.run starts a new one.
+    """
+    return await asyncio.to_thread(_generate_text, contents)
+
+
+def transcribe_with_gemini(video_path: Union[str, ClipFile]) -> Optional[Dict]:
+    """
+    Transcribe video using Gemini API
+    
+    Args:
+        video_path: Path to video file, or a ClipFile already loaded by the caller
         
-        Format your response as valid JSON with this structure:
-        {
-            "transcript": "Full transcript of the entire clip",
-            "segments": [
-                {
-                    "start_time": 0.0,
-                    "end_time": 5.2,
-                    "text": "Description of what happens in this segment"
-                },
-                ...more segments...
-            ],
-            "players_mentioned": ["Player1", "Player2", ...],
-            "key_events": [
-                {
-                    "time": 12.5,
-                    "event": "Brief description of key event (shot, pass, etc.)"
-                },
-                ...more events...
-            ]
-        }
-        
-        Use real player names if you can identify them. For timestamps, use seconds.
-        Include only the JSON in your response, nothing else.
-        """
-        
-        # Create a multipart prompt with the text and video
-        response = model.generate_content([
-            prompt,
-            {"mime_type": mimetype, "data": video_data}
-        ])
-            
-        # Extract JSON from response
-        try:
-            response_text = response.text
-            
-            # Check if response needs cleaning (removing markdown code block)
-            if "```json" in response_text:
-                json_content = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                json_content = response_text.split("```")[1].split("```")[0].strip()
-            else:
-                json_content = response_text.strip()
-                
-            # Parse the JSON
-            result = json.loads(json_content)
-            
-            logger.info(f"Successfully transcribed video with Gemini API")
-            return result
+    Returns:
+        Dictionary with transcription and timestamps, or None if failed
+    """
+    try:
+        clip = video_path if isinstance(video_path, ClipFile) else ClipFile.load(video_path)
+        contents = _build_transcription_contents(clip)
+        if contents is None:
+            return create_dummy_transcript()
+        
+        return _parse_transcript_text(_generate_text(contents))
             
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing Gemini response as JSON: {str(e)}")
-            logger.error(f"Raw response: {response.text}")
-            return None
+    except Exception as e:
+        logger.error(f"Error transcribing with Gemini: {str(e)}")
+        return None
+
+
+async def transcribe_with_gemini_async(video_path: Union[str, ClipFile]) -> Optional[Dict]:
+    """
+    Transcribe video using Gemini API without blocking the event loop
+    
+    Args:
+        video_path: Path to video file, or a ClipFile already loaded by the caller
+        
+    Returns:
+        Dictionary with transcription and timestamps, or None if failed
+    """
+    try:
+        clip = video_path if isinstance(video_path, ClipFile) else ClipFile.load(video_path)
+        contents = await asyncio.to_thread(_build_transcription_contents, clip)
+        if contents is None:
+            return create_dummy_transcript()
+        
+        return _parse_transcript_text(await _generate_text_async(contents))
             
     except Exception as e:
         logger.error(f"Error transcribing with Gemini: {str(e)}")
         return None
+
+
 def create_dummy_transcript() -> Dict:
     """
     Create a dummy transcript when transcription fails
@@ -341,12 +710,89 @@ def create_dummy_transcript() -> Dict:
     }
 
 
-def process_clip(clip_metadata: Dict) -> Dict:
+# Output directories already created by this process
+_ensured_dirs = set()
+
+
+def _ensure_output_dir(clip_id: str) -> str:
+    """Create a clip's output directory, skipping the mkdir if this process already did"""
+    output_dir = os.path.join(PROCESSED_DIR, clip_id)
+    if output_dir not in _ensured_dirs:
+        os.makedirs(output_dir, exist_ok=True)
+        _ensured_dirs.add(output_dir)
+    return output_dir
+
+
+def _ensure_output_dirs(clip_metadatas: List[Dict]) -> None:
+    """Create the output directories for a whole batch up front"""
+    for clip_metadata in clip_metadatas:
+        if clip_metadata.get("clip_id"):
+            _ensure_output_dir(clip_metadata["clip_id"])
+
+
+def _start_results(clip_metadata: Dict, processed_at: str = None) -> Dict:
+    """Create the output directory and initial results for a clip"""
+    clip_id = clip_metadata.get("clip_id")
+    output_dir = _ensure_output_dir(clip_id)
+    
+    return {
+        "clip_id": clip_id,
+        "original_metadata": clip_metadata,
+        "processed_at": processed_at or datetime.now().isoformat(),
+        "output_dir": output_dir
+    }
+
+
+def _dump_result(result: Dict, indent: bool = False) -> bytes:
+    """Serialize a result dictionary to JSON bytes, compact unless indent is set"""
+    if orjson is not None:
+        return orjson.dumps(result, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(result, indent=2).encode('utf-8')
+    return json.dumps(result, separators=(',', ':')).encode('utf-8')
+
+
+def _save_results(results: Dict, transcript_data: Dict, save_file: bool = True) -> Dict:
+    """Merge transcript data into the results and save them to the output directory"""
+    results.update(transcript_data)
+    if not save_file:
+        logger.info(f"Processed clip {results['clip_id']}")
+        return results
+    
+    output_path = os.path.join(results["output_dir"], "processed_data.json")
+    data = _dump_result(results, indent=DEBUG)
+    # One write through a large buffer; no fsync, the page cache is durable enough here
+    try:
+        f = open(output_path, 'wb', buffering=RESULT_WRITE_BUFFER)
+    except FileNotFoundError:
+        # The output directory was removed after this process created it
+        os.makedirs(results["output_dir"], exist_ok=True)
+        f = open(output_path, 'wb', buffering=RESULT_WRITE_BUFFER)
+    with f:
+        f.write(data)
+        
+    logger.info(f"Processed clip {results['clip_id']}, saved results to {output_path}")
+    return results
+
+
+def _error_result(clip_metadata: Dict, error: Exception, processed_at: str = None) -> Dict:
+    """Build the result returned for a clip that failed to process"""
+    logger.error(f"Error processing clip {clip_metadata.get('clip_id')}: {str(error)}")
+    return {
+        "clip_id": clip_metadata.get("clip_id"),
+        "error": str(error),
+        "processed_at": processed_at or datetime.now().isoformat()
+    }
+
+
+def process_clip(clip_metadata: Dict, processed_at: str = None, save_file: bool = True) -> Dict:
     """
     Process a video clip for LLM analysis using Gemini
     
     Args:
         clip_metadata: Clip metadata dictionary
+        processed_at: Optional timestamp shared by all clips in a batch
+        save_file: Whether to write processed_data.json to the clip's output directory
         
     Returns:
         Dictionary with processed data
@@ -355,97 +801,296 @@ def process_clip(clip_metadata: Dict) -> Dict:
         clip_id = clip_metadata.get("clip_id")
         local_path = clip_metadata.get("local_path")
         
-        if not local_path or not os.path.exists(local_path):
+        # Stat the clip once; the existence check, duration and upload share the result
+        try:
+            clip = ClipFile.load(local_path) if local_path else None
+        except FileNotFoundError:
+            clip = None
+        if clip is None:
             logger.error(f"Clip file not found: {local_path}")
             return {"error": f"Clip file not found: {local_path}"}
             
         logger.info(f"Processing clip {clip_id}: {local_path}")
+        results = _start_results(clip_metadata, processed_at)
         
-        # Create output directory
-        output_dir = os.path.join(PROCESSED_DIR, clip_id)
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Initialize results dictionary
-        results = {
-            "clip_id": clip_id,
-            "original_metadata": clip_metadata,
-            "processed_at": datetime.now().isoformat(),
-            "output_dir": output_dir
-        }
-        
-        # Check if it's a text file (dummy clip or placeholder)
+        # Text files are dummy clips or placeholders
         if local_path.endswith('.txt'):
             logger.info(f"Processing text file as dummy clip: {local_path}")
-            
-            # Read the text file
-            with open(local_path, 'r') as f:
-                text_content = f.read()
-                
-            # Use the content as a transcript or create a dummy
-            transcript_data = create_dummy_transcript()
-            
-            # Add to results
-            results.update(transcript_data)
-            
-            # Save processed results
-            output_path = os.path.join(output_dir, "processed_data.json")
-            with open(output_path, 'w') as f:
-                json.dump(results, f, indent=2)
-                
-            logger.info(f"Processed dummy clip {clip_id}, saved results to {output_path}")
-            return results
+            return _save_results(results, create_dummy_transcript(), save_file)
         
-        # Get video duration
-        duration = get_video_duration(local_path)
-        if duration:
-            results["duration"] = duration
+        results["duration"] = _clip_duration(clip)
         
-        # Transcribe with Gemini
-        transcript_data = transcribe_with_gemini(local_path)
+        # Transcribe with Gemini, unless this content was transcribed before
+        digest, transcript_data = _load_cached_transcript(clip)
+        if transcript_data is None:
+            transcript_data = transcribe_with_gemini(clip)
+            if transcript_data:
+                _store_cached_transcript(digest, transcript_data)
         
         # Fall back to dummy transcript if transcription failed
         if not transcript_data:
             logger.warning(f"Transcription failed for {clip_id}, using dummy transcript")
             transcript_data = create_dummy_transcript()
         
-        # Add transcript data to results
-        results.update(transcript_data)
+        return _save_results(results, transcript_data, save_file)
+        
+    except Exception as e:
+        return _error_result(clip_metadata, e, processed_at)
+
+
+async def process_clip_async(clip_metadata: Dict,
+                             semaphore: Optional[asyncio.Semaphore] = None,
+                             processed_at: str = None,
+                             save_file: bool = True) -> Dict:
+    """
+    Process a video clip like process_clip, running blocking work in threads
+    
+    Args:
+        clip_metadata: Clip metadata dictionary
+        semaphore: Optional semaphore bounding concurrent Gemini requests
+        processed_at: Optional timestamp shared by all clips in a batch
+        save_file: Whether to write processed_data.json to the clip's output directory
         
-        # Save processed results
-        output_path = os.path.join(output_dir, "processed_data.json")
-        with open(output_path, 'w') as f:
-            json.dump(results, f, indent=2)
+    Returns:
+        Dictionary with processed data
+    """
+    try:
+        clip_id = clip_metadata.get("clip_id")
+        local_path = clip_metadata.get("local_path")
+        
+        # Stat the clip once; the existence check, duration and upload share the result
+        try:
+            clip = ClipFile.load(local_path) if local_path else None
+        except FileNotFoundError:
+            clip = None
+        if clip is None:
+            logger.error(f"Clip file not found: {local_path}")
+            return {"error": f"Clip file not found: {local_path}"}
             
-        logger.info(f"Processed clip {clip_id}, saved results to {output_path}")
-        return results
+        logger.info(f"Processing clip {clip_id}: {local_path}")
+        results = _start_results(clip_metadata, processed_at)
+        
+        # Text files are dummy clips or placeholders
+        if local_path.endswith('.txt'):
+            logger.info(f"Processing text file as dummy clip: {local_path}")
+            return await asyncio.to_thread(_save_results, results, create_dummy_transcript(), save_file)
+        
+        results["duration"] = await asyncio.to_thread(_clip_duration, clip)
+        
+        # Transcribe with Gemini, unless this content was transcribed before
+        digest, transcript_data = await asyncio.to_thread(_load_cached_transcript, clip)
+        if transcript_data is None:
+            if semaphore is None:
+                transcript_data = await transcribe_with_gemini_async(clip)
+            else:
+                async with semaphore:
+                    transcript_data = await transcribe_with_gemini_async(clip)
+            if transcript_data:
+                await asyncio.to_thread(_store_cached_transcript, digest, transcript_data)
+        
+        # Fall back to dummy transcript if transcription failed
+        if not transcript_data:
+            logger.warning(f"Transcription failed for {clip_id}, using dummy transcript")
+            transcript_data = create_dummy_transcript()
+        
+        return await asyncio.to_thread(_save_results, results, transcript_data, save_file)
         
     except Exception as e:
-        logger.error(f"Error processing clip {clip_metadata.get('clip_id')}: {str(e)}")
-        return {
-            "clip_id": clip_metadata.get("clip_id"),
-            "error": str(e),
-            "processed_at": datetime.now().isoformat()
-        }
+        return _error_result(clip_metadata, e, processed_at)
 
 
-def process_clip_batch(clip_metadatas: List[Dict]) -> List[Dict]:
+def _prefetch_clips(clip_metadatas: List[Dict]) -> None:
+    """
+    Ask the kernel to start reading all clips in a batch into the page cache
+    
+    posix_fadvise(WILLNEED) queues readahead without blocking, so the
+    storage reads for every clip overlap instead of happening one clip
+    at a time when it is hashed or uploaded. No-op where unsupported.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for clip_metadata in clip_metadatas:
+        local_path = clip_metadata.get("local_path")
+        if not local_path or local_path.endswith('.txt'):
+            continue
+        try:
+            fd = os.open(local_path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def _open_batch_jsonl() -> BinaryIO:
+    """Open the batch results log for appending through a large buffer"""
+    os.makedirs(PROCESSED_DIR, exist_ok=True)
+    return open(BATCH_JSONL_PATH, 'ab', buffering=RESULT_WRITE_BUFFER)
+
+
+def _append_result(jsonl: BinaryIO, result: Dict) -> Dict:
+    """Append one result record to the batch results log"""
+    # A single write call per record, so lines from concurrent clips never interleave
+    jsonl.write(_dump_result(result) + b"\n")
+    return result
+
+
+async def _process_clip_batch_async(clip_metadatas: List[Dict], jsonl: BinaryIO) -> List[Dict]:
+    """Process clips concurrently, with at most GEMINI_MAX_CONCURRENCY Gemini requests in flight"""
+    semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+    processed_at = datetime.now().isoformat()
+    await asyncio.to_thread(_prefetch_clips, clip_metadatas)
+    await asyncio.to_thread(_ensure_output_dirs, clip_metadatas)
+    
+    async def process(clip_metadata: Dict) -> Dict:
+        try:
+            result = await process_clip_async(clip_metadata, semaphore, processed_at, INDIVIDUAL_FILES)
+        except Exception as e:
+            result = _error_result(clip_metadata, e, processed_at)
+        return _append_result(jsonl, result)
+    
+    return await asyncio.gather(*(process(clip_metadata) for clip_metadata in clip_metadatas))
+
+
+async def process_clip_batch_async(clip_metadatas: List[Dict]) -> List[Dict]:
     """
-    Process a batch of clips
+    Process a batch of clips concurrently, from inside a running event loop
     
     Args:
         clip_metadatas: List of clip metadata dictionaries
         
     Returns:
-        List of processed data dictionaries
+        List of processed data dictionaries, in the same order as the input
     """
     logger.info(f"Processing batch of {len(clip_metadatas)} clips")
     
-    results = []
-    for clip_metadata in clip_metadatas:
-        result = process_clip(clip_metadata)
-        results.append(result)
+    # Every result is appended to batch.jsonl; per-clip files only when INDIVIDUAL_FILES is on
+    with _open_batch_jsonl() as jsonl:
+        results = await _process_clip_batch_async(clip_metadatas, jsonl)
     
-    logger.info(f"Processed {len(results)} clips")
+    logger.info(f"Processed {len(results)} clips, appended results to {BATCH_JSONL_PATH}")
+    return results
+
+
+def process_clip_batch(clip_metadatas: List[Dict]) -> List[Dict]:
+    """
+    Process a batch of clips concurrently
+    
+    Callers already running an event loop should await
+    process_clip_batch_async instead.
+    
+    Args:
+        clip_metadatas: List of clip metadata dictionaries
+        
+    Returns:
+        List of processed data dictionaries, in the same order as the input
+    """
+    return asyncio.run(process_clip_batch_async(clip_metadatas))
+
+
+def _batch_request_line(gcs_uri: str, mimetype: str) -> str:
+    """Build one Vertex AI batch prediction request line for a clip stored in GCS"""
+    return batch_request_line([{"text": TRANSCRIPTION_PROMPT}, file_part(gcs_uri, mimetype)],
+                              generation_config={"responseMimeType": "application/json"})
+
+
+def process_clip_batch_job(clip_metadatas: List[Dict], bucket_name: str = None) -> List[Dict]:
+    """
+    Process a batch of clips with a Vertex AI Gemini batch prediction job
+    
+    Clips are staged in GCS, one request per clip is written to a JSONL
+    input file, and the job is polled until it finishes. Batch jobs are
+    billed at a discount and are not limited by per-request round trips,
+    but take minutes to schedule, so this suits large backlogs rather
+    than interactive use. Requires GOOGLE_CLOUD_PROJECT and a bucket
+    (argument or GEMINI_BATCH_BUCKET).
+    
+    Args:
+        clip_metadatas: List of clip metadata dictionaries
+        bucket_name: GCS bucket for staging clips, requests and output
+        
+    Returns:
+        List of processed data dictionaries, in the same order as the input
+        
+    Raises:
+        TimeoutError: If the job does not finish within BATCH_MAX_WAIT seconds
+    """
+    bucket = get_bucket(bucket_name)
+    
+    logger.info(f"Processing batch of {len(clip_metadatas)} clips with a batch job")
+    started_at = datetime.now()
+    run_prefix = f"clip_batches/{started_at.strftime('%Y%m%d%H%M%S')}"
+    
+    # Stage videos in GCS; placeholders and missing files go through the normal path
+    results: List[Optional[Dict]] = [None] * len(clip_metadatas)
+    processed_at = started_at.isoformat()
+    _prefetch_clips(clip_metadatas)
+    _ensure_output_dirs(clip_metadatas)
+    staged = {}  # Index in clip_metadatas -> GCS video URI
+    clip_files = {}  # Index in clip_metadatas -> ClipFile
+    digests = {}  # Index in clip_metadatas -> clip content digest
+    request_lines = []
+    for i, clip_metadata in enumerate(clip_metadatas):
+        local_path = clip_metadata.get("local_path")
+        if not local_path or local_path.endswith('.txt'):
+            results[i] = process_clip(clip_metadata, processed_at, INDIVIDUAL_FILES)
+            continue
+        try:
+            clip = clip_files[i] = ClipFile.load(local_path)
+        except FileNotFoundError:
+            results[i] = process_clip(clip_metadata, processed_at, INDIVIDUAL_FILES)
+            continue
+        except Exception as e:
+            results[i] = _error_result(clip_metadata, e, processed_at)
+            continue
+        try:
+            digests[i], cached = _load_cached_transcript(clip)
+            if cached is not None:
+                # Already transcribed; process_clip reuses the cached transcript
+                results[i] = process_clip(clip_metadata, processed_at, INDIVIDUAL_FILES)
+                continue
+            upload = clip
+            if clip.size > TRANSCODE_THRESHOLD_MB * 1024 * 1024:
+                upload = _transcode_for_analysis(clip)
+            blob_name = f"{run_prefix}/videos/{clip_metadata['clip_id']}{os.path.splitext(upload.path)[1]}"
+            bucket.blob(blob_name).upload_from_filename(upload.path, content_type=upload.mimetype)
+            staged[i] = f"gs://{bucket.name}/{blob_name}"
+            request_lines.append(_batch_request_line(staged[i], upload.mimetype))
+        except Exception as e:
+            results[i] = _error_result(clip_metadata, e, processed_at)
+    
+    texts = {}
+    if request_lines:
+        texts = run_batch_job(bucket, run_prefix, request_lines)
+    
+    # Join responses back to their clips and save results
+    for i, gcs_uri in staged.items():
+        clip_metadata = clip_metadatas[i]
+        try:
+            results[i] = _start_results(clip_metadata, processed_at)
+            results[i]["duration"] = _clip_duration(clip_files[i])
+            
+            transcript_data = _parse_transcript_text(texts[gcs_uri]) if gcs_uri in texts else None
+            if transcript_data:
+                _store_cached_transcript(digests[i], transcript_data)
+            else:
+                logger.warning(f"Transcription failed for {clip_metadata['clip_id']}, using dummy transcript")
+                transcript_data = create_dummy_transcript()
+            _save_results(results[i], transcript_data, INDIVIDUAL_FILES)
+        except Exception as e:
+            results[i] = _error_result(clip_metadata, e, processed_at)
+    if request_lines:
+        delete_batch_files(bucket, run_prefix)
+    
+    # Every result is appended to batch.jsonl; per-clip files only when INDIVIDUAL_FILES is on
+    with _open_batch_jsonl() as jsonl:
+        for result in results:
+            _append_result(jsonl, result)
+    
+    logger.info(f"Processed {len(results)} clips, appended results to {BATCH_JSONL_PATH}")
     return results
 
 
@@ -469,6 +1114,11 @@ class ClipProcessor:
     def process_batch(clip_metadatas: List[Dict]) -> List[Dict]:
         """Process a batch of clips"""
         return process_clip_batch(clip_metadatas)
+    
+    @staticmethod
+    def process_batch_job(clip_metadatas: List[Dict], bucket_name: str = None) -> List[Dict]:
+        """Process a batch of clips with a Vertex AI batch prediction job"""
+        return process_clip_batch_job(clip_metadatas, bucket_name)
 
 
 # Command-line interface
@@ -486,6 +1136,9 @@ if __name__ == "__main__":
     # Process unprocessed clips command
     unprocessed_parser = subparsers.add_parser("process-unprocessed", help="Process all unprocessed clips")
     unprocessed_parser.add_argument("--limit", type=int, default=0, help="Maximum number of clips to process (0 for all)")
+    unprocessed_parser.add_argument("--batch-job", action="store_true",
+                                    help="Submit a Vertex AI batch prediction job instead of calling Gemini per clip")
+    unprocessed_parser.add_argument("--bucket", help="GCS bucket for batch jobs (defaults to GEMINI_BATCH_BUCKET)")
     
     # Get video duration command
     duration_parser = subparsers.add_parser("duration", help="Get video duration")
@@ -513,8 +1166,8 @@ if __name__ == "__main__":
             """Stub for mark_clip_as_processed"""
             pass
     
-    # Set up Gemini API
-    if not setup_gemini_api():
+    # Set up Gemini API (batch jobs authenticate to Vertex AI with application default credentials)
+    if not getattr(args, "batch_job", False) and not setup_gemini_api():
         logger.error("Failed to set up Gemini API. Make sure GEMINI_API_KEY is set.")
         sys.exit(1)
     
@@ -550,13 +1203,14 @@ if __name__ == "__main__":
             
         print(f"Processing {len(unprocessed_clips)} unprocessed clips")
         
-        # Process each clip
-        for clip_metadata in unprocessed_clips:
+        # Process the clips concurrently, or as one batch prediction job
+        if args.batch_job:
+            results = process_clip_batch_job(unprocessed_clips, args.bucket)
+        else:
+            results = process_clip_batch(unprocessed_clips)
+        
+        for clip_metadata, result in zip(unprocessed_clips, results):
             clip_id = clip_metadata["clip_id"]
-            print(f"Processing clip {clip_id}...")
-            
-            result = process_clip(clip_metadata)
-            
             if "error" not in result:
                 # Mark as processed
                 mark_clip_as_processed(clip_id)
@@ -1,13 +1,39 @@
 # direct_analysis_engine.py
 
 import os
+import re
 import json
+import asyncio
+import functools
+import hashlib
 import logging
-from typing import Dict, List, Optional, Union, Any
+import mmap
+import shutil
+import subprocess
+from typing import Callable, Dict, List, Optional, Tuple, Union, Any
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+import numpy as np
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from tenacity import (before_sleep_log, retry, retry_if_exception_type,
+                      stop_after_attempt, wait_exponential)
 import time
 import base64
+from gemini_batch import batch_request_line, delete_batch_files, file_part, get_bucket, run_batch_job
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
 
 # Set up logging
 logging.basicConfig(
@@ -18,17 +44,543 @@ logger = logging.getLogger('direct_analysis_engine')
 
 # Constants
 ANALYSIS_DIR = "analyses"
+CACHE_DIR = os.path.join(ANALYSIS_DIR, "_cache")  # Gemini responses by video content hash (BLAKE3 or SHA-256)
+TRANSCODE_DIR = os.path.join(ANALYSIS_DIR, "_transcoded")  # Preprocessed videos by content hash
+ANALYSIS_INDEX_FILE = "index.jsonl"  # One line per saved analysis, without the analysis text
+PREPROCESS_HEIGHT = 720  # Videos are downscaled to at most this height before upload
+PREPROCESS_VIDEO_BITRATE = "500k"
+PREPROCESS_TIMEOUT = 600  # Seconds before giving up on a transcode and uploading the original
+PROMPT_VERSION = "v3"  # Bump when prompt templates change to invalidate cached responses
+GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "8"))  # Concurrent batch requests
+FILE_POLL_INTERVAL = 2  # Seconds between Files API state checks
+FILE_PROCESSING_TIMEOUT = 300  # Seconds to wait for an upload to become active
+SEMANTIC_CACHE_DIR = os.path.join(ANALYSIS_DIR, "_semantic_cache")  # Text results by input embedding
+EMBEDDING_MODEL = "models/text-embedding-004"
+SEGMENTS_SIMILARITY_THRESHOLD = 0.98  # Timestamps must match closely, so segments reuse is strict
+SUMMARY_SIMILARITY_THRESHOLD = 0.95
+TEXT_MODEL = "gemini-2.0-flash"  # Model for segment extraction and summaries
+DERIVED_MEMO_SIZE = 32  # Analyses whose summary and segments are kept in memory
+PROMPT_TEXT_HEAD = 4000  # Characters of a long analysis kept from the start in text prompts
+PROMPT_TEXT_TAIL = 2000  # ... and from the end, where the key plays section is
+
+# Structured output for the combined summary and key segments request
+DERIVED_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "OBJECT",
+        "properties": {
+            "summary": {"type": "STRING"},
+            "segments": {
+                "type": "ARRAY",
+                "items": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "timestamp": {"type": "STRING"},
+                        "description": {"type": "STRING"},
+                        "significance": {"type": "STRING"}
+                    },
+                    "required": ["timestamp", "description"]
+                }
+            }
+        },
+        "required": ["summary", "segments"]
+    }
+}
 os.makedirs(ANALYSIS_DIR, exist_ok=True)
 
+
+# Analysis rubrics for different analysis types. They hold no per-video text, so
+# every request of a type starts with the same bytes and Gemini can cache them
+_PROMPT_TEMPLATES = {
+    "general": """
+You are a professional NBA sports analyst. Analyze this basketball clip.
+
+Provide a professional, insightful analysis covering:
+1. Key plays and moments
+2. Player performance and techniques
+3. Strategic elements and team dynamics
+4. Notable statistics or achievements
+
+Your analysis should:
+- Include specific timestamps when referencing moments in the clip
+- Use basketball terminology appropriately
+- Provide meaningful insights beyond what's obvious
+- Highlight both offensive and defensive aspects
+- Note any remarkable player skills or decisions
+
+Format your analysis in clear sections with professional terminology. Always include timestamps when referencing specific moments.
+
+Include a section at the end called "Key Plays" that lists the most important moments with their timestamps in a concise format.
+""",
+
+    "offensive": """
+You are a professional NBA offensive coordinator analyst. Analyze the offensive aspects of this basketball clip.
+
+Provide a detailed analysis of the offensive strategies and execution, covering:
+1. Offensive formations and play patterns
+2. Shot selection and shooting efficiency
+3. Ball movement and passing lanes
+4. Screen setting and player positioning
+5. Spacing and movement without the ball
+6. Decision-making by ball handlers
+
+Your analysis should:
+- Include specific timestamps when referencing moments in the clip
+- Evaluate the effectiveness of offensive choices
+- Identify successful patterns and missed opportunities
+- Consider how defenders were manipulated or countered
+- Note any remarkable offensive skills or decisions
+
+Format your analysis with clear sections using professional offensive terminology. Always include timestamps when referencing specific moments.
+
+Include a section at the end called "Key Offensive Plays" that lists the most important offensive moments with their timestamps in a concise format.
+""",
+
+    "defensive": """
+You are a professional NBA defensive specialist analyst. Analyze the defensive aspects of this basketball clip.
+
+Provide a detailed analysis of the defensive strategies and execution, covering:
+1. Defensive schemes and approaches
+2. Individual defensive assignments and execution
+3. Help defense and rotations
+4. Rebounding positioning and technique
+5. Transition defense
+6. Defensive communication and coordination
+
+Your analysis should:
+- Include specific timestamps when referencing moments in the clip
+- Evaluate the effectiveness of defensive choices
+- Identify successful stops and defensive breakdowns
+- Consider how defenders reacted to offensive actions
+- Note any remarkable defensive skills or decisions
+
+Format your analysis with clear sections using professional defensive terminology. Always include timestamps when referencing specific moments.
+
+Include a section at the end called "Key Defensive Plays" that lists the most important defensive moments with their timestamps in a concise format.
+""",
+
+    "player_focus": """
+You are a professional NBA player development analyst. Focus your analysis on the individual players in this basketball clip.
+
+Provide a detailed player-focused analysis, covering:
+1. Individual strengths demonstrated in the clip
+2. Technical skills showcased (shooting form, dribbling, footwork, etc.)
+3. Decision-making and basketball IQ moments
+4. Off-ball movement and positioning
+5. Areas for potential improvement
+
+Your analysis should:
+- Include specific timestamps when referencing moments in the clip
+- Break down analysis by individual players when possible
+- Evaluate technical execution of basketball fundamentals
+- Identify highest-impact player contributions
+- Note any unique or signature moves by specific players
+
+Format your analysis by player where possible, using professional terminology. Always include timestamps when referencing specific moments.
+
+Include a section at the end called "Player Highlights" that lists the most notable player moments with their timestamps in a concise format.
+""",
+
+    "coaching": """
+You are a professional NBA coach. Analyze this basketball clip from a coaching perspective.
+
+Provide a coaching-focused analysis, covering:
+1. Set plays and offensive/defensive schemes identified
+2. Tactical adjustments that worked or could have been made
+3. Player utilization and matchup exploitation
+4. Clock management and situational decision-making
+5. Teaching points for practice and player development
+
+Your analysis should:
+- Include specific timestamps when referencing moments in the clip
+- Evaluate coaching decisions and their outcomes
+- Identify alternative approaches that could have been used
+- Consider how this relates to typical team strategies
+- Provide specific drills or teaching points to address any issues
+
+Format your analysis as if you were breaking down film with assistant coaches. Always include timestamps when referencing specific moments.
+
+Include a section at the end called "Coaching Points" that lists the most important teaching moments with their timestamps in a concise format.
+""",
+}
+
+# Matches a JSON array or object inside a markdown code fence in a response
+_JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*(\[[\s\S]*?\]|\{[\s\S]*?\})\s*```")
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes with orjson, or stdlib json without it"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+
+def _load_json_file(path: str) -> Any:
+    """Read and parse a JSON file in one pass over its bytes"""
+    with open(path, 'rb') as f:
+        return _json_loads(f.read())
+
+# Stripped once at import
+STATIC_RUBRIC = {analysis_type: template.strip() for analysis_type, template in _PROMPT_TEMPLATES.items()}
+
+# The only per-video part of a prompt, sent after the rubric
+_TITLE_SUFFIX = 'Video title: "{title}"'
+
+
+@functools.lru_cache(maxsize=8)
+def _get_model(model_name: str) -> genai.GenerativeModel:
+    """Get a model by name, shared by all engine instances"""
+    return genai.GenerativeModel(model_name)
+
+
+def _clip_text(text: str, head: int = PROMPT_TEXT_HEAD, tail: int = PROMPT_TEXT_TAIL) -> str:
+    """Shorten long text to its head and tail, which hold the overview and the key plays list"""
+    if len(text) <= head + tail:
+        return text
+    return text[:head] + "\n\n...[middle elided]...\n\n" + text[-tail:]
+
+
+_FFMPEG = shutil.which("ffmpeg")
+
+
+def _preprocess_video(video_path: str, mimetype: str, video_digest: str) -> Tuple[str, str]:
+    """
+    Downscale a video to 720p at a low bitrate for upload
+    
+    Play-by-play analysis does not need 1080p or 4K, and the smaller
+    file uploads faster and costs fewer input tokens. Audio is kept at a
+    low bitrate since commentary helps the analysis. Outputs are cached
+    by the source video's content hash and the encoding settings.
+    
+    Returns:
+        Tuple of (path, mimetype) to upload; the original video if ffmpeg
+        is unavailable, the transcode fails or times out, or it would not be smaller
+    """
+    original = (video_path, mimetype)
+    if _FFMPEG is None:
+        return original
+    output_path = os.path.join(
+        TRANSCODE_DIR, f"{video_digest}_{PREPROCESS_HEIGHT}p_{PREPROCESS_VIDEO_BITRATE}.mp4")
+    try:
+        output_size = os.path.getsize(output_path)
+    except FileNotFoundError:
+        os.makedirs(TRANSCODE_DIR, exist_ok=True)
+        tmp_path = f"{output_path}.{threading.get_ident()}.tmp"
+        command = [
+            _FFMPEG, '-y', '-v', 'error',
+            '-i', video_path,
+            '-vf', f"scale=-2:'min({PREPROCESS_HEIGHT},ih)'",
+            '-c:v', 'libx264', '-preset', 'veryfast', '-b:v', PREPROCESS_VIDEO_BITRATE,
+            '-c:a', 'aac', '-b:a', '64k',
+            '-movflags', '+faststart',
+            '-f', 'mp4', tmp_path
+        ]
+        try:
+            result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                                    timeout=PREPROCESS_TIMEOUT)
+            error = result.stderr.strip() if result.returncode != 0 else None
+        except subprocess.TimeoutExpired:
+            error = f"timed out after {PREPROCESS_TIMEOUT}s"
+        if error is not None:
+            logger.warning(f"Could not preprocess {video_path}, uploading original: {error}")
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            return original
+        os.replace(tmp_path, output_path)
+        output_size = os.path.getsize(output_path)
+    
+    original_size = os.path.getsize(video_path)
+    if output_size >= original_size:
+        return original
+    logger.info(f"Preprocessed {video_path} for upload "
+                f"({original_size / (1024 * 1024):.1f} MB -> {output_size / (1024 * 1024):.1f} MB)")
+    return output_path, 'video/mp4'
+
+
+def _chunk_text(chunk) -> str:
+    """Get the text of a streamed response chunk; chunks without text parts yield nothing"""
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+def _hash_bytes(data) -> str:
+    """Hash a buffer with multithreaded BLAKE3, or SHA-256 without blake3"""
+    if blake3 is not None:
+        return blake3.blake3(data, max_threads=blake3.blake3.AUTO).hexdigest()
+    return hashlib.sha256(data).hexdigest()
+
+
+# Retry Gemini calls on rate limiting and transient server errors, backing off
+# exponentially; other errors (bad requests, oversized input) fail immediately
+_gemini_retry = retry(
+    wait=wait_exponential(multiplier=1, min=1, max=30),
+    stop=stop_after_attempt(5),
+    retry=retry_if_exception_type((google_exceptions.ResourceExhausted,
+                                   google_exceptions.ServiceUnavailable,
+                                   google_exceptions.InternalServerError)),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True
+)
+
+
+@_gemini_retry
+def _generate_text(model: genai.GenerativeModel, contents: Any,
+                   on_text: Callable[[str], None] = None, **kwargs) -> str:
+    """Call Gemini with retries, streaming the response and returning its full text"""
+    response = model.generate_content(contents, stream=True, **kwargs)
+    chunks = []
+    for chunk in response:
+        text = _chunk_text(chunk)
+        chunks.append(text)
+        if on_text is not None and text:
+            on_text(text)
+    return "".join(chunks)
+
+
+def _video_digest(video_path: str) -> str:
+    """
+    Hash a video's contents for use as a cache key
+    
+    The file is memory-mapped and hashed in place, so no copy of it is
+    made in Python and pages are read in lazily by the kernel.
+    """
+    with open(video_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return _hash_bytes(b"")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return _hash_bytes(mapped)
+
+
+# Video mimetypes by file extension; anything else is sent as mp4
+_MIME = {
+    '.mp4': 'video/mp4',
+    '.mov': 'video/quicktime',
+    '.avi': 'video/x-msvideo',
+}
+
+
+@dataclass(frozen=True)
+class VideoMeta:
+    """Everything analysis needs to know about a video file, gathered once"""
+    path: str
+    title: str
+    name: str  # Filename without extension
+    ext: str
+    mimetype: str
+    size_mb: float
+    digest: str  # Content hash, keys the response and preprocessing caches
+    
+    @classmethod
+    def load(cls, video_path: str, video_title: str = None) -> "VideoMeta":
+        """Stat and hash a video; raises FileNotFoundError if it does not exist"""
+        size_mb = os.stat(video_path).st_size / (1024 * 1024)
+        filename = os.path.basename(video_path)
+        name, ext = os.path.splitext(filename)
+        ext = ext.lower()
+        return cls(
+            path=video_path,
+            title=video_title or filename,
+            name=name,
+            ext=ext,
+            mimetype=_MIME.get(ext, 'video/mp4'),
+            size_mb=size_mb,
+            digest=_video_digest(video_path)
+        )
+
+
+def _upload_video(video_path: str, mimetype: str):
+    """
+    Upload a video with the Gemini Files API and wait until it is usable
+    
+    Args:
+        video_path: Path to video file
+        mimetype: Video mimetype
+        
+    Returns:
+        Active Files API file handle
+    """
+    video_file = genai.upload_file(path=video_path, mime_type=mimetype)
+    deadline = time.monotonic() + FILE_PROCESSING_TIMEOUT
+    while video_file.state.name == "PROCESSING":
+        if time.monotonic() > deadline:
+            _delete_uploaded_file(video_file)
+            raise TimeoutError(f"Gemini file {video_file.name} still processing after {FILE_PROCESSING_TIMEOUT}s")
+        time.sleep(FILE_POLL_INTERVAL)
+        video_file = genai.get_file(video_file.name)
+    if video_file.state.name != "ACTIVE":
+        _delete_uploaded_file(video_file)
+        raise RuntimeError(f"Gemini file processing failed for {video_path}: {video_file.state.name}")
+    logger.info(f"Uploaded {video_path} to Gemini as {video_file.name}")
+    return video_file
+
+
+async def _upload_video_async(video_path: str, mimetype: str):
+    """Async twin of _upload_video, polling without blocking the event loop"""
+    video_file = await asyncio.to_thread(genai.upload_file, path=video_path, mime_type=mimetype)
+    deadline = time.monotonic() + FILE_PROCESSING_TIMEOUT
+    while video_file.state.name == "PROCESSING":
+        if time.monotonic() > deadline:
+            await asyncio.to_thread(_delete_uploaded_file, video_file)
+            raise TimeoutError(f"Gemini file {video_file.name} still processing after {FILE_PROCESSING_TIMEOUT}s")
+        await asyncio.sleep(FILE_POLL_INTERVAL)
+        video_file = await asyncio.to_thread(genai.get_file, video_file.name)
+    if video_file.state.name != "ACTIVE":
+        await asyncio.to_thread(_delete_uploaded_file, video_file)
+        raise RuntimeError(f"Gemini file processing failed for {video_path}: {video_file.state.name}")
+    logger.info(f"Uploaded {video_path} to Gemini as {video_file.name}")
+    return video_file
+
+
+def _delete_uploaded_file(video_file) -> None:
+    """Delete a file from Gemini storage, ignoring failures"""
+    try:
+        genai.delete_file(video_file.name)
+    except Exception as e:
+        logger.warning(f"Error deleting Gemini file {video_file.name}: {str(e)}")
+
+
+def _batch_request_line(analysis_type: str, video_title: str, gcs_uri: str, mimetype: str) -> str:
+    """Build one Vertex AI batch prediction request line analyzing a video stored in GCS"""
+    return batch_request_line([{"text": _TITLE_SUFFIX.format(title=video_title)}, file_part(gcs_uri, mimetype)],
+                              system_instruction=STATIC_RUBRIC.get(analysis_type, STATIC_RUBRIC["general"]))
+
+
+def _prefetch_videos(video_paths: List[str]) -> None:
+    """
+    Ask the kernel to start reading all videos in a batch into the page cache
+    
+    posix_fadvise(WILLNEED) queues readahead without blocking, so disk
+    reads for later videos overlap the Gemini requests for earlier ones
+    instead of stalling each video's hash and read. No-op where unsupported.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for video_path in video_paths:
+        try:
+            fd = os.open(video_path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+class AnalysisCache:
+    """
+    File-backed cache of Gemini responses
+    
+    Exposes get/set plus hit and miss counters, so a shared backend such
+    as Redis can replace it without changing the engine.
+    """
+    
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.stats = {"hits": 0, "misses": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key.replace(":", "_") + ".json")
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss"""
+        try:
+            value = _load_json_file(self._path(key))["response"]
+        except (OSError, ValueError, KeyError):
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return value
+    
+    def set(self, key: str, value: str) -> None:
+        """Store a response, atomically so readers never see a partial file"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_json_dumps({"key": key, "response": value}))
+        os.replace(tmp_path, path)
+
+
+class SemanticCache:
+    """
+    Results of text prompts, looked up by cosine similarity of the input text
+    
+    Embeddings are unit-normalized and stored as rows of a matrix, so the
+    nearest neighbour is a single inner product. The matrix and results
+    are persisted under SEMANTIC_CACHE_DIR.
+    """
+    
+    def __init__(self, name: str, threshold: float, cache_dir: str = SEMANTIC_CACHE_DIR):
+        self.threshold = threshold
+        self.vectors_path = os.path.join(cache_dir, f"{name}.npy")
+        self.values_path = os.path.join(cache_dir, f"{name}.json")
+        self._lock = threading.Lock()  # Guards vectors and values together
+        self._write_lock = threading.Lock()  # Serializes persisting to disk
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            self.vectors = np.load(self.vectors_path)
+            self.values = _load_json_file(self.values_path)
+            if len(self.values) != len(self.vectors):
+                raise ValueError("Embedding and result counts differ")
+        except (OSError, ValueError) as e:
+            if os.path.exists(self.vectors_path):
+                logger.warning(f"Ignoring unreadable semantic cache {self.vectors_path}: {str(e)}")
+            self.vectors = None
+            self.values = []
+    
+    def get(self, vector: np.ndarray, threshold: float = None) -> Optional[Any]:
+        """Return the result stored for the most similar input, if it is similar enough"""
+        with self._lock:
+            vectors, values = self.vectors, self.values
+        if vectors is None or vectors.shape[1] != vector.shape[0]:
+            return None
+        scores = vectors @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < (self.threshold if threshold is None else threshold):
+            return None
+        logger.info(f"Semantic cache hit (similarity {scores[best]:.3f})")
+        return values[best]
+    
+    def set(self, vector: np.ndarray, value: Any) -> None:
+        """Add a result and persist the cache"""
+        with self._write_lock:
+            with self._lock:
+                if self.vectors is None or self.vectors.shape[1] != vector.shape[0]:
+                    self.vectors = vector[np.newaxis, :]
+                    self.values = [value]
+                else:
+                    self.vectors = np.vstack([self.vectors, vector])
+                    self.values = self.values + [value]
+                vectors, values = self.vectors, self.values
+            
+            values_tmp = f"{self.values_path}.{os.getpid()}.tmp"
+            vectors_tmp = f"{self.vectors_path}.{os.getpid()}.tmp"
+            with open(values_tmp, 'wb') as f:
+                f.write(_json_dumps(values))
+            with open(vectors_tmp, 'wb') as f:
+                np.save(f, vectors)
+            os.replace(vectors_tmp, self.vectors_path)
+            os.replace(values_tmp, self.values_path)
+
+
 class DirectAnalysisEngine:
     """Direct video-to-analysis engine using Gemini"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, preprocess: bool = True):
         """
         Initialize the analysis engine
         
         Args:
             api_key: Gemini API key (defaults to GEMINI_API_KEY environment variable)
+            preprocess: Downscale videos to 720p with ffmpeg before upload
         """
         self.api_key = os.environ.get("GEMINI_API_KEY")
         
@@ -41,7 +593,22 @@ class DirectAnalysisEngine:
         
         # Use Gemini Pro Vision for video analysis
         self.model_name = "gemini-2.0-flash"
-        self.model = genai.GenerativeModel(self.model_name)
+        self.model = _get_model(self.model_name)
+        
+        # Text model for segment extraction and summaries, built once
+        self._text_model = _get_model(TEXT_MODEL)
+        self.preprocess = preprocess
+        self.cache = AnalysisCache()
+        self._rubric_models: Dict[str, genai.GenerativeModel] = {}
+        self._rubric_lock = threading.Lock()
+        
+        # Analysis files are written off the request path
+        self._io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="analysis-io")
+        self._pending_saves: List[Future] = []
+        self._pending_saves_lock = threading.Lock()
+        self._derived_cache = SemanticCache("derived", SUMMARY_SIMILARITY_THRESHOLD)
+        self._derived_memo: "OrderedDict[Union[str, Tuple[str, float]], Dict]" = OrderedDict()
+        self._derived_memo_lock = threading.Lock()
         
         logger.info(f"Initialized Direct Analysis Engine with model: {self.model_name}")
     
@@ -56,127 +623,77 @@ class DirectAnalysisEngine:
         Returns:
             Formatted prompt text
         """
-        # Analysis prompt templates for different analysis types
-        prompt_templates = {
-            "general": f"""
-                You are a professional NBA sports analyst. Analyze this basketball clip titled "{video_title}".
-                
-                Provide a professional, insightful analysis covering:
-                1. Key plays and moments
-                2. Player performance and techniques
-                3. Strategic elements and team dynamics
-                4. Notable statistics or achievements
-                
-                Your analysis should:
-                - Include specific timestamps when referencing moments in the clip
-                - Use basketball terminology appropriately
-                - Provide meaningful insights beyond what's obvious
-                - Highlight both offensive and defensive aspects
-                - Note any remarkable player skills or decisions
-                
-                Format your analysis in clear sections with professional terminology. Always include timestamps when referencing specific moments.
-                
-                Include a section at the end called "Key Plays" that lists the most important moments with their timestamps in a concise format.
-            """,
-            
-            "offensive": f"""
-                You are a professional NBA offensive coordinator analyst. Analyze the offensive aspects of this basketball clip titled "{video_title}".
-                
-                Provide a detailed analysis of the offensive strategies and execution, covering:
-                1. Offensive formations and play patterns
-                2. Shot selection and shooting efficiency
-                3. Ball movement and passing lanes
-                4. Screen setting and player positioning
-                5. Spacing and movement without the ball
-                6. Decision-making by ball handlers
-                
-                Your analysis should:
-                - Include specific timestamps when referencing moments in the clip
-                - Evaluate the effectiveness of offensive choices
-                - Identify successful patterns and missed opportunities
-                - Consider how defenders were manipulated or countered
-                - Note any remarkable offensive skills or decisions
-                
-                Format your analysis with clear sections using professional offensive terminology. Always include timestamps when referencing specific moments.
-                
-                Include a section at the end called "Key Offensive Plays" that lists the most important offensive moments with their timestamps in a concise format.
-            """,
-            
-            "defensive": f"""
-                You are a professional NBA defensive specialist analyst. Analyze the defensive aspects of this basketball clip titled "{video_title}".
-                
-                Provide a detailed analysis of the defensive strategies and execution, covering:
-                1. Defensive schemes and approaches
-                2. Individual defensive assignments and execution
-                3. Help defense and rotations
-                4. Rebounding positioning and technique
-                5. Transition defense
-                6. Defensive communication and coordination
-                
-                Your analysis should:
-                - Include specific timestamps when referencing moments in the clip
-                - Evaluate the effectiveness of defensive choices
-                - Identify successful stops and defensive breakdowns
-                - Consider how defenders reacted to offensive actions
-                - Note any remarkable defensive skills or decisions
-                
-                Format your analysis with clear sections using professional defensive terminology. Always include timestamps when referencing specific moments.
-                
-                Include a section at the end called "Key Defensive Plays" that lists the most important defensive moments with their timestamps in a concise format.
-            """,
-            
-            "player_focus": f"""
-                You are a professional NBA player development analyst. Focus your analysis on the individual players in this basketball clip titled "{video_title}".
-                
-                Provide a detailed player-focused analysis, covering:
-                1. Individual strengths demonstrated in the clip
-                2. Technical skills showcased (shooting form, dribbling, footwork, etc.)
-                3. Decision-making and basketball IQ moments
-                4. Off-ball movement and positioning
-                5. Areas for potential improvement
-                
-                Your analysis should:
-                - Include specific timestamps when referencing moments in the clip
-                - Break down analysis by individual players when possible
-                - Evaluate technical execution of basketball fundamentals
-                - Identify highest-impact player contributions
-                - Note any unique or signature moves by specific players
-                
-                Format your analysis by player where possible, using professional terminology. Always include timestamps when referencing specific moments.
-                
-                Include a section at the end called "Player Highlights" that lists the most notable player moments with their timestamps in a concise format.
-            """,
-            
-            "coaching": f"""
-                You are a professional NBA coach. Analyze this basketball clip titled "{video_title}" from a coaching perspective.
-                
-                Provide a coaching-focused analysis, covering:
-                1. Set plays and offensive/defensive schemes identified
-                2. Tactical adjustments that worked or could have been made
-                3. Player utilization and matchup exploitation
-                4. Clock management and situational decision-making
-                5. Teaching points for practice and player development
-                
-                Your analysis should:
-                - Include specific timestamps when referencing moments in the clip
-                - Evaluate coaching decisions and their outcomes
-                - Identify alternative approaches that could have been used
-                - Consider how this relates to typical team strategies
-                - Provide specific drills or teaching points to address any issues
-                
-                Format your analysis as if you were breaking down film with assistant coaches. Always include timestamps when referencing specific moments.
-                
-                Include a section at the end called "Coaching Points" that lists the most important teaching moments with their timestamps in a concise format.
-            """
+        # Use the appropriate rubric or fall back to general; the title goes last
+        rubric = STATIC_RUBRIC.get(analysis_type, STATIC_RUBRIC["general"])
+        
+        return f"{rubric}\n\n{_TITLE_SUFFIX.format(title=video_title)}"
+    
+    def _rubric_model(self, analysis_type: str) -> genai.GenerativeModel:
+        """
+        Get a model whose system instruction is the rubric for an analysis type
+        
+        Every request of a type then starts with the same bytes, which lets
+        Gemini's implicit prefix caching apply. The rubrics are far below the
+        minimum size for explicit cached content, so none is created.
+        """
+        rubric_type = analysis_type if analysis_type in STATIC_RUBRIC else "general"
+        with self._rubric_lock:
+            model = self._rubric_models.get(rubric_type)
+            if model is None:
+                model = genai.GenerativeModel(self.model_name, system_instruction=STATIC_RUBRIC[rubric_type])
+                self._rubric_models[rubric_type] = model
+            return model
+    
+    def _upload_source(self, video: VideoMeta) -> Tuple[str, str]:
+        """Get the path and mimetype to upload for a video, preprocessing it if enabled"""
+        if not self.preprocess:
+            return video.path, video.mimetype
+        return _preprocess_video(video.path, video.mimetype, video.digest)
+    
+    def _cache_key(self, video_digest: str, analysis_type: str) -> str:
+        """Compose the response cache key for a video and analysis type"""
+        return f"{video_digest}:{analysis_type}:{self.model_name}:{PROMPT_VERSION}"
+    
+    def _start_analysis(self, video: VideoMeta, analysis_type: str) -> None:
+        """Log the start of an analysis, warning about very large videos"""
+        logger.info(f"Analyzing video: {video.title} ({analysis_type})")
+        
+        if video.size_mb > 100:
+            logger.warning(f"Video file is large ({video.size_mb:.2f} MB), which may exceed model limits")
+    
+    def _finish_analysis(self, video: VideoMeta, analysis_type: str, analysis_text: str) -> Dict:
+        """Build the analysis result and save it to file"""
+        analyzed_at = datetime.now().isoformat()
+        result = {
+            "video_path": video.path,
+            "video_title": video.title,
+            "analysis_type": analysis_type,
+            "analysis": analysis_text,
+            "analyzed_at": analyzed_at
         }
         
-        # Use the appropriate template or fall back to general
-        prompt = prompt_templates.get(analysis_type, prompt_templates["general"])
+        # Save analysis to file
+        saved_path = self._save_analysis(result, video.name, analyzed_at)
+        result["saved_path"] = saved_path
         
-        return prompt.strip()
+        logger.info(f"Successfully analyzed video: {video.title}")
+        return result
+    
+    def _analysis_error(self, video_path: str, video_title: Optional[str], analysis_type: str,
+                        error: BaseException) -> Dict:
+        """Build the result returned when analyzing a video fails"""
+        logger.error(f"Error analyzing video: {str(error)}")
+        return {
+            "video_path": video_path,
+            "video_title": video_title or os.path.basename(video_path),
+            "error": str(error),
+            "analysis_type": analysis_type,
+            "analyzed_at": datetime.now().isoformat()
+        }
     
     def analyze_video_file(self, video_path: str, video_title: str = None, 
-                          analysis_type: str = "general") -> Dict:
+                          analysis_type: str = "general",
+                          on_text: Callable[[str], None] = None) -> Dict:
         """
         Analyze a video file directly with Gemini
         
@@ -184,144 +701,419 @@ class DirectAnalysisEngine:
             video_path: Path to video file
             video_title: Optional title of video (defaults to filename)
             analysis_type: Type of analysis to perform
+            on_text: Optional callback receiving the analysis text as it is
+                generated (all at once for a cached response)
             
         Returns:
             Dictionary with analysis results
         """
         try:
-            if not os.path.exists(video_path):
+            try:
+                video = VideoMeta.load(video_path, video_title)
+            except FileNotFoundError:
                 logger.error(f"Video file not found: {video_path}")
                 return {"error": f"Video file not found: {video_path}"}
                 
-            # Get video title if not provided
-            if not video_title:
-                video_title = os.path.basename(video_path)
-                
-            logger.info(f"Analyzing video: {video_title} ({analysis_type})")
-            
-            # Create the analysis prompt
-            prompt = self.create_analysis_prompt(video_title, analysis_type)
-            
-            # Get video mimetype based on extension
-            extension = os.path.splitext(video_path)[1].lower()
-            if extension == '.mp4':
-                mimetype = 'video/mp4'
-            elif extension == '.mov':
-                mimetype = 'video/quicktime'
-            elif extension == '.avi':
-                mimetype = 'video/x-msvideo'
+            self._start_analysis(video, analysis_type)
+            
+            # Reuse an earlier response for the same video content and analysis type
+            cache_key = self._cache_key(video.digest, analysis_type)
+            analysis_text = self.cache.get(cache_key)
+            if analysis_text is not None:
+                logger.info(f"Response cache hit for {video.title} ({analysis_type})")
+                if on_text is not None:
+                    on_text(analysis_text)
             else:
-                mimetype = 'video/mp4'  # Default to mp4
+                logger.info(f"Response cache miss for {video.title} ({analysis_type})")
+                upload_path, upload_mimetype = self._upload_source(video)
+                analysis_text = self._generate_analysis(analysis_type, video.title, upload_path, upload_mimetype,
+                                                        on_text)
+                self.cache.set(cache_key, analysis_text)
             
-            # Check file size
-            file_size = os.path.getsize(video_path) / (1024 * 1024)  # Size in MB
+            return self._finish_analysis(video, analysis_type, analysis_text)
+            
+        except Exception as e:
+            return self._analysis_error(video_path, video_title, analysis_type, e)
+    
+    async def _analyze_one_async(self, video_path: str, video_title: Optional[str],
+                                 analysis_type: str, semaphore: asyncio.Semaphore) -> Dict:
+        """
+        Analyze a video like analyze_video_file without blocking the event loop
+        
+        File reads, hashing and saving run in threads; the Gemini request is
+        awaited while holding the semaphore.
+        """
+        try:
+            try:
+                video = await asyncio.to_thread(VideoMeta.load, video_path, video_title)
+            except FileNotFoundError:
+                logger.error(f"Video file not found: {video_path}")
+                return {"error": f"Video file not found: {video_path}"}
+                
+            self._start_analysis(video, analysis_type)
             
-            if file_size > 100:
-                logger.warning(f"Video file is large ({file_size:.2f} MB), which may exceed model limits")
+            # Reuse an earlier response for the same video content and analysis type
+            cache_key = self._cache_key(video.digest, analysis_type)
+            analysis_text = self.cache.get(cache_key)
+            if analysis_text is not None:
+                logger.info(f"Response cache hit for {video.title} ({analysis_type})")
+            else:
+                logger.info(f"Response cache miss for {video.title} ({analysis_type})")
+                async with semaphore:
+                    upload_path, upload_mimetype = await asyncio.to_thread(self._upload_source, video)
+                    analysis_text = await self._generate_analysis_async(analysis_type, video.title,
+                                                                         upload_path, upload_mimetype)
+                self.cache.set(cache_key, analysis_text)
             
-            # Read video file in binary mode
-            with open(video_path, 'rb') as f:
-                video_data = f.read()
+            return self._finish_analysis(video, analysis_type, analysis_text)
             
-            # Create a multipart prompt with the text and video
+        except Exception as e:
+            return self._analysis_error(video_path, video_title, analysis_type, e)
+    
+    async def _analyze_videos_batch_async(self, video_paths: List[str], video_titles: List[Optional[str]],
+                                          analysis_type: str,
+                                          on_result: Callable[[int, Dict], None] = None) -> List[Dict]:
+        """Analyze videos concurrently, with at most GEMINI_MAX_CONCURRENCY requests in flight"""
+        semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+        await asyncio.to_thread(_prefetch_videos, video_paths)
+        
+        async def analyze(index: int, video_path: str, video_title: Optional[str]) -> Dict:
             try:
-                response = self.model.generate_content([
-                    prompt,
-                    {"mime_type": mimetype, "data": video_data}
-                ])
-                
-                # Extract analysis text
-                analysis_text = response.text
-                
+                result = await self._analyze_one_async(video_path, video_title, analysis_type, semaphore)
             except Exception as e:
-                logger.error(f"Error generating analysis with Gemini: {str(e)}")
-                
-                # If file is too large, try to send a portion
-                if file_size > 10:
-                    logger.info("Attempting to analyze a portion of the video...")
-                    # Just use the first 10MB of the video
-                    video_data = video_data[:10 * 1024 * 1024]
-                    
-                    response = self.model.generate_content([
-                        prompt + "\n\nNote: Due to size limitations, only the first portion of the video is being analyzed.",
-                        {"mime_type": mimetype, "data": video_data}
-                    ])
-                    
-                    analysis_text = response.text
-                else:
-                    # Re-raise if the file isn't too large
-                    raise
+                result = self._analysis_error(video_path, video_title, analysis_type, e)
+            if on_result is not None:
+                on_result(index, result)
+            return result
+        
+        return await asyncio.gather(
+            *(analyze(index, video_path, video_title)
+              for index, (video_path, video_title) in enumerate(zip(video_paths, video_titles)))
+        )
+    
+    def analyze_videos_batch(self, video_paths: List[str], analysis_type: str = "general",
+                             video_titles: List[Optional[str]] = None,
+                             on_result: Callable[[int, Dict], None] = None) -> List[Dict]:
+        """
+        Analyze several video files concurrently
+        
+        Args:
+            video_paths: Paths to video files
+            analysis_type: Type of analysis to perform for every video
+            video_titles: Optional titles, one per video (default to filenames)
+            on_result: Optional callback receiving (index, result) as each video
+                finishes; called on the calling thread
             
-            # Create analysis result
-            result = {
-                "video_path": video_path,
-                "video_title": video_title,
-                "analysis_type": analysis_type,
-                "analysis": analysis_text,
-                "analyzed_at": datetime.now().isoformat()
-            }
+        Returns:
+            List of analysis result dictionaries, in the same order as the input
+        """
+        if video_titles is None:
+            video_titles = [None] * len(video_paths)
+        logger.info(f"Analyzing batch of {len(video_paths)} videos ({analysis_type})")
+        results = asyncio.run(self._analyze_videos_batch_async(video_paths, video_titles, analysis_type,
+                                                               on_result))
+        self.wait_for_saves()
+        logger.info(f"Analyzed {sum('error' not in result for result in results)} of {len(results)} videos")
+        return results
+    
+    def analyze_videos_batch_job(self, video_paths: List[str], analysis_type: str = "general",
+                                 video_titles: List[Optional[str]] = None,
+                                 bucket_name: str = None) -> List[Dict]:
+        """
+        Analyze several video files with a Vertex AI Gemini batch prediction job
+        
+        Videos are staged in GCS, one request per video is written to a JSONL
+        input file, and the job is polled until it finishes. Batch jobs are
+        billed at a discount but take minutes to schedule, so this suits
+        larger sets of clips. Videos with a cached response are not
+        resubmitted. Requires GOOGLE_CLOUD_PROJECT and a bucket (argument or
+        GEMINI_BATCH_BUCKET).
+        
+        Args:
+            video_paths: Paths to video files
+            analysis_type: Type of analysis to perform for every video
+            video_titles: Optional titles, one per video (default to filenames)
+            bucket_name: GCS bucket for staging videos, requests and output
             
-            # Save analysis to file
-            saved_path = self._save_analysis(result)
-            result["saved_path"] = saved_path
+        Returns:
+            List of analysis result dictionaries, in the same order as the input
             
-            logger.info(f"Successfully analyzed video: {video_title}")
-            return result
+        Raises:
+            TimeoutError: If the job does not finish within BATCH_MAX_WAIT seconds
+        """
+        bucket = get_bucket(bucket_name)
+        if video_titles is None:
+            video_titles = [None] * len(video_paths)
+        
+        logger.info(f"Analyzing batch of {len(video_paths)} videos ({analysis_type}) with a batch job")
+        run_prefix = f"analysis_batches/{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        _prefetch_videos(video_paths)
+        
+        # Stage videos in GCS; cached responses are finished right away
+        results: List[Optional[Dict]] = [None] * len(video_paths)
+        staged = {}  # Index in video_paths -> (VideoMeta, GCS video URI)
+        request_lines = []
+        for i, (video_path, video_title) in enumerate(zip(video_paths, video_titles)):
+            try:
+                video = VideoMeta.load(video_path, video_title)
+                self._start_analysis(video, analysis_type)
+                analysis_text = self.cache.get(self._cache_key(video.digest, analysis_type))
+                if analysis_text is not None:
+                    logger.info(f"Response cache hit for {video.title} ({analysis_type})")
+                    results[i] = self._finish_analysis(video, analysis_type, analysis_text)
+                    continue
+                upload_path, upload_mimetype = self._upload_source(video)
+                blob_name = f"{run_prefix}/videos/{i}_{video.digest[:16]}{os.path.splitext(upload_path)[1]}"
+                bucket.blob(blob_name).upload_from_filename(upload_path, content_type=upload_mimetype)
+                gcs_uri = f"gs://{bucket.name}/{blob_name}"
+                staged[i] = (video, gcs_uri)
+                request_lines.append(_batch_request_line(analysis_type, video.title, gcs_uri, upload_mimetype))
+            except Exception as e:
+                results[i] = self._analysis_error(video_path, video_title, analysis_type, e)
+        
+        texts = {}
+        if request_lines:
+            texts = run_batch_job(bucket, run_prefix, request_lines)
+        
+        # Join responses back to their videos and save them
+        for i, (video, gcs_uri) in staged.items():
+            analysis_text = texts.get(gcs_uri)
+            if analysis_text is None:
+                results[i] = self._analysis_error(video.path, video.title, analysis_type,
+                                                  RuntimeError("No response in batch job output"))
+                continue
+            self.cache.set(self._cache_key(video.digest, analysis_type), analysis_text)
+            results[i] = self._finish_analysis(video, analysis_type, analysis_text)
+        if request_lines:
+            delete_batch_files(bucket, run_prefix)
+        
+        self.wait_for_saves()
+        logger.info(f"Analyzed {sum('error' not in result for result in results)} of {len(results)} videos")
+        return results
+    
+    def _generate_analysis(self, analysis_type: str, video_title: str, video_path: str, mimetype: str,
+                           on_text: Callable[[str], None] = None) -> str:
+        """
+        Upload a video with the Files API and analyze it with Gemini
+        
+        Args:
+            analysis_type: Type of analysis to perform
+            video_title: Title of the video
+            video_path: Path to video file
+            mimetype: Video mimetype
+            on_text: Optional callback receiving the analysis text as it streams in
             
+        Returns:
+            Analysis text
+        """
+        model = self._rubric_model(analysis_type)
+        video_file = _upload_video(video_path, mimetype)
+        try:
+            return _generate_text(model, [_TITLE_SUFFIX.format(title=video_title), video_file], on_text)
         except Exception as e:
-            logger.error(f"Error analyzing video: {str(e)}")
-            return {
-                "video_path": video_path,
-                "video_title": video_title or os.path.basename(video_path),
-                "error": str(e),
-                "analysis_type": analysis_type,
-                "analyzed_at": datetime.now().isoformat()
-            }
+            logger.error(f"Error generating analysis with Gemini: {str(e)}")
+            raise
+        finally:
+            _delete_uploaded_file(video_file)
     
-    def _save_analysis(self, analysis_result: Dict) -> str:
+    async def _generate_analysis_async(self, analysis_type: str, video_title: str,
+                                       video_path: str, mimetype: str) -> str:
+        """
+        Async twin of _generate_analysis, uploading the video in a thread
+        
+        The request itself also runs in a thread. generate_content_async would
+        bind the shared models' gRPC client to this batch's event loop, and
+        every later batch runs on a new loop that the client cannot use.
+        """
+        model = await asyncio.to_thread(self._rubric_model, analysis_type)
+        video_file = await _upload_video_async(video_path, mimetype)
+        try:
+            return await asyncio.to_thread(_generate_text, model,
+                                           [_TITLE_SUFFIX.format(title=video_title), video_file])
+        except Exception as e:
+            logger.error(f"Error generating analysis with Gemini: {str(e)}")
+            raise
+        finally:
+            await asyncio.to_thread(_delete_uploaded_file, video_file)
+    
+    def _save_analysis(self, analysis_result: Dict, video_name: str, analyzed_at: str) -> str:
         """
         Save analysis result to file with properly formatted text
         
+        The result is serialized on the calling thread and the files are
+        written by a background I/O thread, so callers do not wait on the
+        disk. Use wait_for_saves to block until the files exist.
+        
         Args:
             analysis_result: Analysis result dictionary
+            video_name: Video filename without extension
+            analyzed_at: ISO timestamp of the analysis, also used in the filename
             
         Returns:
-            Path to saved file
+            Path the analysis is being saved to
         """
         try:
-            video_name = os.path.splitext(os.path.basename(analysis_result["video_path"]))[0]
             analysis_type = analysis_result.get("analysis_type", "general")
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            # YYYYMMDD_HHMMSS from the ISO timestamp
+            timestamp = analyzed_at.replace("-", "").replace(":", "")[:15].replace("T", "_")
             
             # Create filename
             filename = f"{video_name}_{analysis_type}_{timestamp}.json"
             filepath = os.path.join(ANALYSIS_DIR, filename)
             
-            # Create a formatted copy of the result for saving
-            formatted_result = analysis_result.copy()
+            # Serialize now so later changes to the result cannot race the writer
+            json_data = _json_dumps(analysis_result, indent=True)
+            
+            # Also create a plaintext version for easy reading
+            txt_data = (f"Analysis of: {video_name}\n"
+                        f"Type: {analysis_type}\n"
+                        f"Date: {analyzed_at}\n\n"
+                        f"{analysis_result.get('analysis', '')}")
             
-            # Format the analysis text to preserve real line breaks
-            # This ensures the saved JSON has proper formatting and newlines are preserved
+            # Index entry, so listings don't have to parse every analysis file
+            index_line = _json_dumps({
+                "file": filename,
+                "video_path": analysis_result.get("video_path", ""),
+                "video_title": analysis_result.get("video_title", ""),
+                "analysis_type": analysis_type,
+                "analyzed_at": analyzed_at
+            }) + b"\n"
             
-            # Save to file using json.dump with indent and ensuring_ascii=False for better readability
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(formatted_result, f, indent=2, ensure_ascii=False)
+            with self._pending_saves_lock:
+                self._pending_saves = [save for save in self._pending_saves if not save.done()]
+                self._pending_saves.append(
+                    self._io_pool.submit(self._save_analysis_sync, filepath, json_data, txt_data, index_line))
+            return filepath
+                
+        except Exception as e:
+            logger.error(f"Error saving analysis: {str(e)}")
+            return ""
+    
+    def _save_analysis_sync(self, filepath: str, json_data: bytes, txt_data: str, index_line: bytes) -> bool:
+        """
+        Write the JSON and plaintext files for an analysis and index it, returning whether all were written
+        
+        Each file is written under a temporary name and renamed into place,
+        so readers scanning ANALYSIS_DIR never see a partial analysis.
+        """
+        try:
+            # Indented UTF-8 JSON for readability, written in one call
+            json_tmp = f"{filepath}.{threading.get_ident()}.tmp"
+            with open(json_tmp, 'wb') as f:
+                f.write(json_data)
+            os.replace(json_tmp, filepath)
                     
             logger.info(f"Saved analysis to {filepath}")
             
-            # Also create a plaintext version for easy reading
             txt_filepath = filepath.replace('.json', '.txt')
-            with open(txt_filepath, 'w', encoding='utf-8') as f:
-                f.write(f"Analysis of: {video_name}\n")
-                f.write(f"Type: {analysis_type}\n")
-                f.write(f"Date: {analysis_result.get('analyzed_at', '')}\n\n")
-                f.write(analysis_result.get('analysis', ''))
+            txt_tmp = f"{txt_filepath}.{threading.get_ident()}.tmp"
+            with open(txt_tmp, 'w', encoding='utf-8') as f:
+                f.write(txt_data)
+            os.replace(txt_tmp, txt_filepath)
             
-            return filepath
+            # Indexed only once the JSON exists; a single append keeps lines whole.
+            # The app skips rescanning ANALYSIS_DIR until the directory or this
+            # index changes, so saves must rename new files in or append here
+            with open(os.path.join(ANALYSIS_DIR, ANALYSIS_INDEX_FILE), 'ab') as f:
+                f.write(index_line)
+            
+            return True
                 
         except Exception as e:
             logger.error(f"Error saving analysis: {str(e)}")
-            return ""
+            return False
+    
+    def wait_for_saves(self) -> bool:
+        """
+        Block until every analysis file queued so far has been written
+        
+        Returns:
+            True if all writes succeeded, False otherwise
+        """
+        with self._pending_saves_lock:
+            pending, self._pending_saves = self._pending_saves, []
+        return all([save.result() for save in pending])
+        
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed text as a unit vector, or return None if embedding fails"""
+        try:
+            embedding = genai.embed_content(model=EMBEDDING_MODEL, content=text)["embedding"]
+        except Exception as e:
+            logger.warning(f"Could not embed text for semantic cache: {str(e)}")
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+    
+    def analyze_derived(self, analysis_text: str, similarity_threshold: float = None) -> Dict:
+        """
+        Summarize an analysis and extract its key segments in one Gemini call
+        
+        Results are memoized per analysis text, so asking for segments and
+        then a summary of the same analysis costs a single request. Results
+        for near-identical texts are reused from the semantic cache.
+        
+        Args:
+            analysis_text: Analysis text from Gemini
+            similarity_threshold: Minimum cosine similarity for a semantic cache
+                hit (defaults to SUMMARY_SIMILARITY_THRESHOLD)
+            
+        Returns:
+            Dictionary with "summary" text and a "segments" list
+        """
+        if similarity_threshold is None:
+            similarity_threshold = SUMMARY_SIMILARITY_THRESHOLD
+        
+        # Results generated for this exact text serve any threshold; results
+        # reused from a similar text only serve the threshold that accepted them
+        text_key = hashlib.sha256(analysis_text.encode('utf-8')).hexdigest()
+        reused_key = (text_key, similarity_threshold)
+        with self._derived_memo_lock:
+            for memo_key in (text_key, reused_key):
+                derived = self._derived_memo.get(memo_key)
+                if derived is not None:
+                    self._derived_memo.move_to_end(memo_key)
+                    return derived
+        
+        # Reuse results for a near-identical analysis
+        memo_key = reused_key
+        vector = self._embed(analysis_text)
+        if vector is not None:
+            derived = self._derived_cache.get(vector, similarity_threshold)
+        if derived is None:
+            memo_key = text_key
+            derived = self._generate_derived(analysis_text)
+            if vector is not None:
+                self._derived_cache.set(vector, derived)
+        
+        with self._derived_memo_lock:
+            self._derived_memo[memo_key] = derived
+            while len(self._derived_memo) > DERIVED_MEMO_SIZE:
+                self._derived_memo.popitem(last=False)
+        return derived
+    
+    def _generate_derived(self, analysis_text: str) -> Dict:
+        """Ask Gemini for the summary and key segments of an analysis as structured JSON"""
+        prompt = f"""
+        From this basketball analysis, write a summary and extract the key moments:
+        
+        {_clip_text(analysis_text)}
+        
+        For "summary", summarize the analysis in about 2-3 sentences. Keep it concise, informative, and focused on the most important insights.
+        
+        For "segments", list the key moments with their timestamps. Each has a "timestamp" in seconds (e.g. "10.5"), a brief "description" of what happens, and the "significance" of why the moment is important. Extract at least 5 key moments if possible.
+        """
+        
+        response_text = _generate_text(self._text_model, prompt, generation_config=DERIVED_GENERATION_CONFIG)
+        
+        # JSON mode returns bare JSON; tolerate a fenced block anyway
+        match = _JSON_BLOCK_RE.search(response_text)
+        derived = _json_loads(match.group(1) if match else response_text.strip())
+        
+        return {
+            "summary": str(derived.get("summary", "")).strip(),
+            "segments": list(derived.get("segments", []))
+        }
         
     def extract_key_segments(self, analysis_text: str) -> List[Dict]:
         """
@@ -334,46 +1126,7 @@ class DirectAnalysisEngine:
             List of segments with timestamps
         """
         try:
-            # Use Gemini to extract key segments
-            prompt = f"""
-            Extract the key moments with timestamps from this basketball analysis:
-            
-            {analysis_text}
-            
-            Format the output as valid JSON with the following structure:
-            ```json
-            [
-                {{
-                    "timestamp": "10.5",
-                    "description": "Brief description of what happens",
-                    "significance": "Why this moment is important"
-                }},
-                ...
-            ]
-            ```
-            
-            Include only the JSON in your response, nothing else. Extract at least 5 key moments if possible.
-            """
-            
-            # Use regular Gemini Pro for text processing
-            text_model = genai.GenerativeModel('gemini-2.0-flash')
-            
-            # Generate key segments with Gemini
-            response = text_model.generate_content(prompt)
-            
-            # Extract JSON from response
-            response_text = response.text
-            
-            # Clean up the response if it contains markdown code block
-            if "```json" in response_text:
-                json_content = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                json_content = response_text.split("```")[1].split("```")[0].strip()
-            else:
-                json_content = response_text.strip()
-                
-            # Parse the JSON
-            segments = json.loads(json_content)
+            segments = self.analyze_derived(analysis_text, SEGMENTS_SIMILARITY_THRESHOLD)["segments"]
             
             logger.info(f"Extracted {len(segments)} key segments")
             return segments
@@ -394,23 +1147,7 @@ class DirectAnalysisEngine:
             Brief summary text
         """
         try:
-            # Use Gemini to create a summary
-            prompt = f"""
-            Summarize this basketball analysis in about 2-3 sentences:
-            
-            {analysis_text}
-            
-            Keep the summary concise, informative, and focused on the most important insights.
-            """
-            
-            # Use regular Gemini Pro for text processing
-            text_model = genai.GenerativeModel("gemini-2.0-flash")
-            
-            # Generate summary with Gemini
-            response = text_model.generate_content(prompt)
-            
-            # Extract summary text
-            summary = response.text.strip()
+            summary = self.analyze_derived(analysis_text, SUMMARY_SIMILARITY_THRESHOLD)["summary"]
             
             # Truncate if too long
             if len(summary) > max_length:
@@ -436,10 +1173,24 @@ if __name__ == "__main__":
     analyze_parser = subparsers.add_parser("analyze", help="Analyze a video file")
     analyze_parser.add_argument("video_path", help="Path to video file")
     analyze_parser.add_argument("--title", help="Optional video title")
+    analyze_parser.add_argument("--no-preprocess", action="store_true",
+                                help="Upload the original video instead of a 720p copy")
     analyze_parser.add_argument("--type", choices=["general", "offensive", "defensive", 
                                                 "player_focus", "coaching"],
                               default="general", help="Analysis type")
     
+    # Analyze many videos concurrently
+    batch_parser = subparsers.add_parser("analyze-batch", help="Analyze all video files matching a glob")
+    batch_parser.add_argument("pattern", help="Glob pattern for video files, e.g. 'clips/*.mp4'")
+    batch_parser.add_argument("--type", choices=["general", "offensive", "defensive", 
+                                              "player_focus", "coaching"],
+                              default="general", help="Analysis type")
+    batch_parser.add_argument("--no-preprocess", action="store_true",
+                              help="Upload the original videos instead of 720p copies")
+    batch_parser.add_argument("--batch-job", action="store_true",
+                              help="Submit a Vertex AI batch prediction job instead of calling Gemini per video")
+    batch_parser.add_argument("--bucket", help="GCS bucket for batch jobs (defaults to GEMINI_BATCH_BUCKET)")
+    
     # Extract key segments command
     segments_parser = subparsers.add_parser("segments", help="Extract key segments from analysis")
     segments_parser.add_argument("analysis_file", help="Path to analysis JSON file")
@@ -453,35 +1204,56 @@ if __name__ == "__main__":
     
     # Create analysis engine
     try:
-        engine = DirectAnalysisEngine()
+        engine = DirectAnalysisEngine(preprocess=not getattr(args, "no_preprocess", False))
     except ValueError as e:
         print(f"Error: {str(e)}")
         sys.exit(1)
     
     if args.command == "analyze":
-        # Analyze video
-        result = engine.analyze_video_file(args.video_path, args.title, args.type)
+        # Analyze video, printing the analysis as it streams in
+        result = engine.analyze_video_file(args.video_path, args.title, args.type,
+                                           on_text=lambda text: print(text, end='', flush=True))
+        if not engine.wait_for_saves():
+            result["saved_path"] = ""
         
         if "error" in result:
             print(f"Error: {result['error']}")
             sys.exit(1)
             
         # Print brief result
-        print(f"Successfully analyzed video: {result['video_title']}")
+        print(f"\n\nSuccessfully analyzed video: {result['video_title']}")
         print(f"Analysis type: {result['analysis_type']}")
         print(f"Analysis length: {len(result['analysis'])} characters")
         print(f"Saved to: {result.get('saved_path', 'unknown')}")
+            
+    elif args.command == "analyze-batch":
+        import glob
+        
+        video_paths = sorted(glob.glob(args.pattern, recursive=True))
+        if not video_paths:
+            print(f"Error: No files match {args.pattern}")
+            sys.exit(1)
+        
+        if args.batch_job:
+            results = engine.analyze_videos_batch_job(video_paths, args.type, bucket_name=args.bucket)
+        else:
+            results = engine.analyze_videos_batch(video_paths, args.type)
         
-        # Print a brief excerpt
-        excerpt_length = min(200, len(result['analysis']))
-        print("\nExcerpt:")
-        print(result['analysis'][:excerpt_length] + "...")
+        failed = 0
+        for result in results:
+            if "error" in result:
+                failed += 1
+                print(f"Failed: {result.get('video_path', '?')}: {result['error']}")
+            else:
+                print(f"Analyzed: {result['video_title']} -> {result.get('saved_path', 'unknown')}")
+        print(f"\nAnalyzed {len(results) - failed} of {len(results)} videos")
+        if failed:
+            sys.exit(1)
             
     elif args.command == "segments":
         # Load analysis
         try:
-            with open(args.analysis_file, 'r') as f:
-                analysis_data = json.load(f)
+            analysis_data = _load_json_file(args.analysis_file)
                 
             # Extract key segments
             segments = engine.extract_key_segments(analysis_data['analysis'])
@@ -501,8 +1273,7 @@ if __name__ == "__main__":
     elif args.command == "summarize":
         # Load analysis
         try:
-            with open(args.analysis_file, 'r') as f:
-                analysis_data = json.load(f)
+            analysis_data = _load_json_file(args.analysis_file)
                 
             # Create summary
             summary = engine.create_analysis_summary(analysis_data['analysis'], args.max_length)
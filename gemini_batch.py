@@ -0,0 +1,176 @@
+# gemini_batch.py
+
+import os
+import json
+import logging
+import time
+from typing import Any, Dict, List
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('gemini_batch')
+
+# Vertex AI batch prediction settings shared by clip processing and analysis
+BATCH_MODEL = "gemini-2.0-flash-001"
+BATCH_GCS_BUCKET = os.environ.get("GEMINI_BATCH_BUCKET")
+BATCH_POLL_INTERVAL = 10  # Initial seconds between batch job state checks
+BATCH_POLL_MAX_INTERVAL = 300
+BATCH_MAX_WAIT = int(os.environ.get("GEMINI_BATCH_MAX_WAIT", "86400"))  # Seconds before giving up on a job
+BATCH_DONE_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED",
+                     "JOB_STATE_EXPIRED", "JOB_STATE_PARTIALLY_SUCCEEDED"}
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def get_bucket(bucket_name: str = None):
+    """
+    Get the GCS bucket batch jobs are staged in
+    
+    Args:
+        bucket_name: Bucket name (defaults to GEMINI_BATCH_BUCKET)
+    
+    Returns:
+        google.cloud.storage Bucket
+    """
+    from google.cloud import storage
+    
+    bucket_name = bucket_name or BATCH_GCS_BUCKET
+    if not bucket_name:
+        raise ValueError("No GCS bucket for batch jobs. Set GEMINI_BATCH_BUCKET.")
+    return storage.Client().bucket(bucket_name)
+
+
+def batch_request_line(parts: List[Dict], system_instruction: str = None,
+                       generation_config: Dict = None) -> str:
+    """
+    Build one batch prediction request line
+    
+    Args:
+        parts: Parts of the single user turn; exactly one should be a fileData part,
+            whose URI identifies the request in the output
+        system_instruction: Optional system instruction text
+        generation_config: Optional generation config, in the REST API's camelCase
+    
+    Returns:
+        JSON line, newline included
+    """
+    request: Dict[str, Any] = {"contents": [{"role": "user", "parts": parts}]}
+    if system_instruction:
+        request["systemInstruction"] = {"parts": [{"text": system_instruction}]}
+    if generation_config:
+        request["generationConfig"] = generation_config
+    return json.dumps({"request": request}) + "\n"
+
+
+def file_part(gcs_uri: str, mimetype: str) -> Dict:
+    """Build a request part referring to a file stored in GCS"""
+    return {"fileData": {"fileUri": gcs_uri, "mimeType": mimetype}}
+
+
+def read_batch_output(bucket, output_prefix: str) -> Dict[str, str]:
+    """
+    Read batch prediction output and map each request's file URI to its response text
+    
+    Args:
+        bucket: GCS bucket holding the output
+        output_prefix: Object prefix the job wrote its predictions under
+    
+    Returns:
+        Dictionary of GCS file URI to response text
+    """
+    texts = {}
+    for blob in bucket.list_blobs(prefix=output_prefix):
+        if not blob.name.endswith(".jsonl"):
+            continue
+        for line in blob.download_as_text().splitlines():
+            if not line.strip():
+                continue
+            record = None
+            try:
+                record = _json_loads(line)
+                parts = record["request"]["contents"][0]["parts"]
+                gcs_uri = next(part["fileData"]["fileUri"] for part in parts if "fileData" in part)
+                candidate = record["response"]["candidates"][0]
+                texts[gcs_uri] = "".join(part.get("text", "") for part in candidate["content"]["parts"])
+            except (KeyError, IndexError, StopIteration, ValueError, TypeError, AttributeError):
+                status = record.get("status", "no response") if isinstance(record, dict) else "malformed output line"
+                logger.warning(f"Batch prediction failed: {status}")
+    return texts
+
+
+def delete_batch_files(bucket, run_prefix: str):
+    """
+    Delete a job's staged videos, request file and output
+    
+    Failures are logged rather than raised, since the results have already
+    been read by the time this runs.
+    
+    Args:
+        bucket: GCS bucket the job was staged in
+        run_prefix: Object prefix passed to run_batch_job
+    """
+    try:
+        for blob in bucket.list_blobs(prefix=f"{run_prefix}/"):
+            blob.delete()
+    except Exception as e:
+        logger.warning(f"Could not delete batch files under {run_prefix}: {e}")
+
+
+def run_batch_job(bucket, run_prefix: str, request_lines: List[str]) -> Dict[str, str]:
+    """
+    Submit request lines as a batch prediction job, wait for it and read its output
+    
+    The requests are uploaded to <run_prefix>/requests.jsonl and the job
+    writes under <run_prefix>/output. Requires GOOGLE_CLOUD_PROJECT.
+    
+    Args:
+        bucket: GCS bucket to stage the job in
+        run_prefix: Object prefix for this job's files
+        request_lines: Lines from batch_request_line
+    
+    Returns:
+        Dictionary of GCS file URI to response text, for requests that succeeded
+    
+    Raises:
+        TimeoutError: If the job does not finish within BATCH_MAX_WAIT seconds
+    """
+    from google import genai as google_genai
+    from google.genai import types as genai_types
+    
+    bucket.blob(f"{run_prefix}/requests.jsonl").upload_from_string(
+        "".join(request_lines), content_type="application/jsonl")
+    output_uri = f"gs://{bucket.name}/{run_prefix}/output"
+    
+    client = google_genai.Client(
+        vertexai=True,
+        project=os.environ.get("GOOGLE_CLOUD_PROJECT"),
+        location=os.environ.get("GOOGLE_CLOUD_LOCATION", "us-central1")
+    )
+    job = client.batches.create(
+        model=BATCH_MODEL,
+        src=f"gs://{bucket.name}/{run_prefix}/requests.jsonl",
+        config=genai_types.CreateBatchJobConfig(dest=output_uri)
+    )
+    logger.info(f"Submitted batch job {job.name} for {len(request_lines)} requests")
+    
+    # Poll with exponential backoff until the job finishes or the wait runs out
+    deadline = time.monotonic() + BATCH_MAX_WAIT
+    interval = BATCH_POLL_INTERVAL
+    while job.state.name not in BATCH_DONE_STATES:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Batch job {job.name} still {job.state.name} after {BATCH_MAX_WAIT}s; "
+                               f"its output will be written under {output_uri}")
+        time.sleep(interval)
+        interval = min(interval * 2, BATCH_POLL_MAX_INTERVAL)
+        job = client.batches.get(name=job.name)
+    logger.info(f"Batch job {job.name} finished with state {job.state.name}")
+    
+    return read_batch_output(bucket, f"{run_prefix}/output/")
@@ -3,6 +3,7 @@
 import streamlit as st
 import os
 import json
+import hashlib
 import tempfile
 import time
 import pandas as pd
@@ -10,12 +11,20 @@ from datetime import datetime
 import base64
 from typing import Dict, List, Optional
 import sys
-import uuid
+import secrets
 from dotenv import load_dotenv
 import subprocess
 import base64
 from PIL import Image
 import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 
@@ -29,7 +38,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 # Import our custom modules
 try:
     from clip_manager import ClipManager
-    from direct_analysis_engine import DirectAnalysisEngine
+    from direct_analysis_engine import DirectAnalysisEngine, ANALYSIS_INDEX_FILE
 except ImportError:
     st.error("Cannot import required modules. Make sure clip_acquisition.py and direct_analysis_engine.py are in the same directory.")
     st.stop()
@@ -38,6 +47,25 @@ except ImportError:
 TEMP_DIR = "temp_uploads"
 ANALYSIS_DIR = "analyses"
 CLIP_STORAGE_DIR = "clip_storage"
+ANALYSIS_LOAD_WORKERS = min(8, os.cpu_count() or 4)  # Threads for reading analysis files
+PAGES = ("Home", "Upload Clips", "Analyze Clips", "View Analysis", "About")
+
+# Analysis types offered on the Analyze Clips page
+ANALYSIS_TYPES = ("general", "offensive", "defensive", "player_focus", "coaching")
+ANALYSIS_LABELS = {
+    "general": "General Analysis",
+    "offensive": "Offensive Analysis",
+    "defensive": "Defensive Analysis",
+    "player_focus": "Player Focus",
+    "coaching": "Coaching Perspective"
+}
+ANALYSIS_DESCRIPTIONS = {
+    "general": "Overall assessment of plays, players, and strategies",
+    "offensive": "Focus on offensive tactics, plays, and execution",
+    "defensive": "Focus on defensive schemes, rotations, and effectiveness",
+    "player_focus": "Detailed analysis of individual player techniques and decisions",
+    "coaching": "Breakdown from a coach's perspective with teaching points"
+}
 
 # Ensure directories exist
 os.makedirs(TEMP_DIR, exist_ok=True)
@@ -92,26 +120,172 @@ if not api_key:
 # Store the API key in session state for future use
 st.session_state.GEMINI_API_KEY = api_key
 
-# Functions to handle file downloading
-def get_binary_file_downloader_html(bin_file, file_label='File'):
-    with open(bin_file, 'rb') as f:
-        data = f.read()
-    bin_str = base64.b64encode(data).decode()
-    href = f'<a href="data:application/octet-stream;base64,{bin_str}" download="{os.path.basename(bin_file)}">Download {file_label}</a>'
-    return href
+# JSON helpers: orjson when available, stdlib json otherwise
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+def _json_dumps(obj, indent=False):
+    """Serialize to UTF-8 JSON bytes with orjson, or stdlib json without it"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
 
 def read_analysis_file(file_path):
+    """
+    Read a saved analysis file
+    
+    Safe to call from worker threads: errors are returned rather than
+    reported with Streamlit calls.
+    
+    Args:
+        file_path: Path to the analysis JSON file
+        
+    Returns:
+        Tuple of (parsed analysis data, None), or (None, error) if the file can't be read
+    """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(file_path, 'rb') as f:
+            return _json_loads(f.read()), None
     except Exception as e:
-        st.error(f"Error reading analysis file: {str(e)}")
-        return None
+        return None, e
+
+@st.cache_data(show_spinner=False)
+def read_analysis_file_cached(file_path, mtime):
+    """
+    Read a saved analysis file, shared across sessions until it changes
+    
+    Args:
+        file_path: Path to the analysis JSON file
+        mtime: Modification time of the file, so edits invalidate the cache
+        
+    Returns:
+        Same as read_analysis_file
+    """
+    return read_analysis_file(file_path)
+
+@st.cache_data(show_spinner=False)
+def _read_text(path, mtime):
+    """Read a text file, cached until its mtime changes"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def split_analysis_key(key):
+    """Split a "<clip_id>_<analysis_type>" key; clip IDs may contain underscores, and so may types"""
+    for analysis_type in ANALYSIS_TYPES:
+        if key.endswith(f"_{analysis_type}"):
+            return key[:-len(analysis_type) - 1], analysis_type
+    clip_id, _, analysis_type = key.rpartition('_')
+    return clip_id, analysis_type
+
+def format_analysis_option(key, analysis_data):
+    """Format an analysis selectbox option as: <video title> - <analysis type>"""
+    analysis_type = split_analysis_key(key)[1]
+    return f"{analysis_data.get('video_title', 'Unknown')} - {analysis_type.replace('_', ' ').title()}"
+
+def _analysis_key(analysis_data):
+    """Session key for an analysis or index entry: <clip_id>_<analysis_type>"""
+    clip_id = os.path.splitext(os.path.basename(analysis_data.get("video_path", "")))[0]
+    return f"{clip_id}_{analysis_data.get('analysis_type', 'general')}"
+
+@st.cache_data(show_spinner=False)
+def load_analysis_index(index_path, mtime, size):
+    """
+    Read the analysis index the engine appends to as it saves analyses
+    
+    Args:
+        index_path: Path to the index file
+        mtime: Modification time of the index, so new entries invalidate the cache
+        size: Size of the index, for the same reason
+        
+    Returns:
+        Dictionary mapping analysis filenames to their index entries
+    """
+    index = {}
+    with open(index_path, 'rb') as f:
+        for line in f:
+            try:
+                entry = _json_loads(line)
+            except ValueError:
+                continue  # A line still being written
+            index[entry["file"]] = entry
+    return index
+
+def load_new_analyses(analysis_dir, loaded_mtimes):
+    """
+    Find saved analyses that are new or changed since the last call
+    
+    Analyses listed in the engine's index are not parsed: only their index
+    entry is returned, and the file is read when the analysis is viewed.
+    Older files missing from the index are parsed straight away.
+    
+    Args:
+        analysis_dir: Directory containing analysis JSON files
+        loaded_mtimes: Dictionary of file path -> mtime for files already
+            loaded, updated in place
+        
+    Returns:
+        Tuple of (analyses, analysis_files): dictionaries mapping
+        "<clip_id>_<analysis_type>" keys to parsed analysis data, and to
+        {"path", "mtime", "video_title"} for analyses to read on demand
+    """
+    index_path = os.path.join(analysis_dir, ANALYSIS_INDEX_FILE)
+    with os.scandir(analysis_dir) as it:
+        entries = [(entry.path, entry.stat().st_mtime) for entry in it if entry.name.endswith('.json')]
+    
+    # Oldest first, so the newest analysis wins when a clip has several of one type
+    entries.sort(key=lambda entry: entry[1])
+    
+    new_entries = [(file_path, mtime) for file_path, mtime in entries
+                   if loaded_mtimes.get(file_path) != mtime]
+    if not new_entries:
+        return {}, {}
+    
+    try:
+        index_stat = os.stat(index_path)
+        index = load_analysis_index(index_path, index_stat.st_mtime, index_stat.st_size)
+    except FileNotFoundError:
+        index = {}
+    
+    analysis_files = {}
+    unindexed = []
+    for file_path, mtime in new_entries:
+        entry = index.get(os.path.basename(file_path))
+        if entry is None:
+            unindexed.append((file_path, mtime))
+            continue
+        loaded_mtimes[file_path] = mtime
+        analysis_files[_analysis_key(entry)] = {
+            "path": file_path,
+            "mtime": mtime,
+            "video_title": entry.get("video_title", "Unknown")
+        }
+    if not unindexed:
+        return {}, analysis_files
+    
+    # Reading and parsing release the GIL, so load the files in parallel. Workers
+    # get this script run's context so they can use the Streamlit cache
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=min(ANALYSIS_LOAD_WORKERS, len(unindexed)),
+                            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)) as pool:
+        results = list(pool.map(lambda entry: read_analysis_file_cached(*entry), unindexed))
+    
+    analyses = {}
+    for (file_path, mtime), (analysis_data, error) in zip(unindexed, results):
+        loaded_mtimes[file_path] = mtime
+        if error is not None:
+            st.error(f"Error reading analysis file: {str(error)}")
+            continue
+        
+        if analysis_data:
+            analyses[_analysis_key(analysis_data)] = analysis_data
+    return analyses, analysis_files
     
 def get_video_thumbnail(video_path, max_width=320):
     """
     Extract a thumbnail from a video file
     
+    The encoded thumbnail is cached until the video's mtime or size changes,
+    so reruns don't reread, resize and base64-encode the image again.
+    
     Args:
         video_path: Path to the video file
         max_width: Maximum width for the thumbnail
@@ -119,6 +293,15 @@ def get_video_thumbnail(video_path, max_width=320):
     Returns:
         HTML string with the thumbnail image
     """
+    try:
+        stat = os.stat(video_path)
+    except OSError:
+        return None
+    return _cached_video_thumbnail(video_path, stat.st_mtime, stat.st_size, max_width)
+
+@st.cache_data(show_spinner=False)
+def _cached_video_thumbnail(video_path, mtime, size, max_width):
+    """Build the thumbnail for get_video_thumbnail; mtime and size only key the cache"""
     try:
         # Check if file exists and is a video
         if not os.path.exists(video_path) or video_path.endswith('.txt'):
@@ -185,6 +368,57 @@ def get_video_thumbnail(video_path, max_width=320):
         # If anything fails, return None
         return None
 
+# Clip metadata fields shown on the Upload Clips page, with their column headings
+CLIP_TABLE_COLUMNS = {
+    "clip_id": "Clip ID",
+    "title": "Title",
+    "source": "Source",
+    "acquired_at": "Uploaded",
+    "description": "Description"
+}
+
+# The clip list and table are cached as shared resources rather than with
+# st.cache_data: pages only read them, so every rerun can reuse the same
+# objects instead of unpickling a fresh copy. Only the current metadata
+# version is ever requested again, so a couple of entries is enough.
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _cached_get_all_clips(metadata_version):
+    """
+    Get all clips, cached until the clip metadata changes. Don't modify the result
+    
+    Args:
+        metadata_version: ClipManager.get_metadata_version(), so uploads,
+            downloads and new samples invalidate the cache
+        
+    Returns:
+        List of clip metadata dictionaries
+    """
+    return ClipManager.get_all_clips()
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _cached_clip_df(metadata_version):
+    """
+    Get all clips and the table shown for them on the Upload Clips page. Don't modify the result
+    
+    Args:
+        metadata_version: ClipManager.get_metadata_version(), so any change
+            to the clips invalidates the cache
+        
+    Returns:
+        Tuple of (clips, clip_df)
+    """
+    clips = _cached_get_all_clips(metadata_version)
+    clip_df = pd.DataFrame.from_records(
+        clips, columns=list(CLIP_TABLE_COLUMNS)
+    ).rename(columns=CLIP_TABLE_COLUMNS)
+    
+    # Shorten dates and descriptions column-wise, then fill in missing values
+    description = clip_df["Description"].fillna("")
+    clip_df["Description"] = description.where(description == "", description.str[:50] + "...")
+    clip_df["Uploaded"] = clip_df["Uploaded"].str[:10].replace("", None)
+    clip_df = clip_df.fillna({"Clip ID": "Unknown", "Title": "Untitled", "Source": "Unknown", "Uploaded": "Unknown"})
+    return clips, clip_df
+
 # Add this function to create a play button overlay on thumbnails
 def create_thumbnail_with_play_button(thumbnail_base64):
     """
@@ -208,17 +442,131 @@ def create_thumbnail_with_play_button(thumbnail_base64):
     """
     return html
 
-# Initialize session state
-if 'analysis_engine' not in st.session_state:
+@st.cache_resource(show_spinner=False)
+def _create_engine(api_key):
+    """Create the analysis engine, shared by every session using the same API key"""
+    return DirectAnalysisEngine(api_key=api_key)
+
+@st.cache_resource(show_spinner=False)
+def get_clip_manager():
+    """Get the clip manager shared by every session"""
+    return ClipManager()
+
+@st.cache_resource(show_spinner=False)
+def ensure_sample_clips():
+    """
+    Create and register the starter sample clips, at most once per process
+    
+    Concurrent first visits share one call, so the samples aren't created twice.
+    
+    Returns:
+        List of sample clip metadata dictionaries
+        
+    Raises:
+        Exception: If a sample clip could not be registered
+    """
+    # Create a few dummy clips with different themes
+    sample_clips = [
+        {"title": "LeBron James Highlight Reel", "description": "Showcase of LeBron's best plays including dunks and assists"},
+        {"title": "Stephen Curry Three-Point Exhibition", "description": "Collection of Curry's remarkable three-point shots"},
+        {"title": "Defensive Masterclass", "description": "Examples of elite NBA defensive plays and strategies"}
+    ]
+    
+    created_clips = []
+    for sample in sample_clips:
+        # Create a sample clip
+        clip_id = f"sample_{secrets.token_hex(4)}"
+        local_path = os.path.join(CLIP_STORAGE_DIR, f"{clip_id}.txt")
+        
+        # Create a dummy file with NBA play description
+        with open(local_path, 'w') as f:
+            f.write(f"Sample NBA clip: {sample['title']}\n\n")
+            f.write(f"Description: {sample['description']}\n\n")
+            f.write("Play-by-play contents:\n")
+            
+            if "LeBron" in sample['title']:
+                f.write("0:05 - LeBron drives to the basket, crossover on defender\n")
+                f.write("0:08 - Elevates for a powerful dunk over two defenders!\n")
+                f.write("0:24 - Fast break opportunity, LeBron with a behind-the-back pass\n")
+                f.write("0:45 - LeBron with a chase-down block on the opposing player\n")
+            elif "Curry" in sample['title']:
+                f.write("0:12 - Curry with a deep three from 30 feet... BANG!\n")
+                f.write("0:33 - Behind the back dribble, step back, another three pointer\n")
+                f.write("0:51 - Curry catches, pump fake, side step, releases... three points!\n")
+            else:
+                f.write("0:08 - Perfectly timed help defense prevents an easy layup\n")
+                f.write("0:22 - Quick hands lead to a steal and transition opportunity\n")
+                f.write("0:40 - Textbook defensive rotation to close out on the shooter\n")
+        
+        # Create metadata
+        clip_metadata = {
+            "clip_id": clip_id,
+            "source": "sample",
+            "local_path": local_path,
+            "acquired_at": datetime.now().isoformat(),
+            "title": sample['title'],
+            "description": sample['description'],
+            "duration": 60,
+            "is_sample": True,
+            "processed": False
+        }
+        
+        # Save clip metadata; a failure raises so nothing is cached and the next run retries
+        try:
+            get_clip_manager().register_sample(clip_metadata)
+        except Exception:
+            os.remove(local_path)
+            raise
+        created_clips.append(clip_metadata)
+    
+    return created_clips
+
+def _get_engine():
+    """Get the analysis engine, creating it the first time analysis is requested"""
     try:
-        st.session_state.analysis_engine = DirectAnalysisEngine(api_key=api_key)
+        return _create_engine(api_key)
     except Exception as e:
         st.error(f"Error initializing analysis engine: {str(e)}")
         st.error("Make sure your Gemini API key is valid.")
         st.stop()
 
-if 'clip_manager' not in st.session_state:
-    st.session_state.clip_manager = ClipManager()
+@st.cache_data(show_spinner=False)
+def _cached_extract_segments(text_hash, _analysis_text):
+    """
+    Extract key segments from an analysis, cached by the analysis text's hash
+    
+    Args:
+        text_hash: Digest of the analysis text (the cache key)
+        _analysis_text: The analysis text itself, excluded from hashing by the leading underscore
+        
+    Returns:
+        List of key segments
+    """
+    return _get_engine().extract_key_segments(_analysis_text)
+
+def go_to(page):
+    """Button callback that switches the current page"""
+    st.session_state.page = page
+
+def select_clip(clip_id, page="Analyze Clips"):
+    """
+    Button callback that makes a stored clip the current one and opens a page
+    
+    Args:
+        clip_id: ID of the clip to select
+        page: Page to open once the clip is selected
+    """
+    clip = clip_manager.get_clip(clip_id)
+    if not clip:
+        st.error(f"Clip {clip_id} is no longer available.")
+        return
+    st.session_state.current_clip_path = clip["local_path"]
+    st.session_state.current_clip_id = clip["clip_id"]
+    st.session_state.first_visit = False
+    st.session_state.page = page
+
+# Initialize session state
+clip_manager = get_clip_manager()
 
 if 'current_clip_path' not in st.session_state:
     st.session_state.current_clip_path = None
@@ -229,6 +577,9 @@ if 'current_clip_id' not in st.session_state:
 if 'analysis_results' not in st.session_state:
     st.session_state.analysis_results = {}
     
+if 'analysis_files' not in st.session_state:
+    st.session_state.analysis_files = {}  # Saved analyses not read yet, see load_new_analyses
+    
 if 'first_visit' not in st.session_state:
     st.session_state.first_visit = True
 
@@ -236,18 +587,14 @@ if 'first_visit' not in st.session_state:
 st.title("🏀 NBA Game Analysis System")
 
 # Set default page in session state if not already set
-if 'page' not in st.session_state:
-    st.session_state.page = "Home"
+st.session_state.setdefault('page', "Home")
 
-# Sidebar navigation
+# Sidebar navigation, bound to the session state. Buttons elsewhere switch
+# pages through on_click callbacks, which run before the script does, so a
+# click costs a single rerun
 st.sidebar.title("Navigation")
-# Use the session state to determine the default value
-page = st.sidebar.radio("Go to", 
-    ["Home", "Upload Clips", "Analyze Clips", "View Analysis", "About"],
-    index=["Home", "Upload Clips", "Analyze Clips", "View Analysis", "About"].index(st.session_state.page))
+st.sidebar.radio("Go to", PAGES, key='page')
 
-# Update the session state when navigation changes
-st.session_state.page = page
 # HOME PAGE - New page for first-time visitors
 if st.session_state.page == "Home":
     # Welcome message and quick intro
@@ -263,87 +610,31 @@ if st.session_state.page == "Home":
     
     try:
         # Get all clips
-        clips = st.session_state.clip_manager.get_all_clips()
+        clips = _cached_get_all_clips(clip_manager.get_metadata_version())
         
         if not clips:
             # Create sample clips if none exist
             with st.spinner("Setting up sample clips for you..."):
-                # Create a few dummy clips with different themes
-                sample_clips = [
-                    {"title": "LeBron James Highlight Reel", "description": "Showcase of LeBron's best plays including dunks and assists"},
-                    {"title": "Stephen Curry Three-Point Exhibition", "description": "Collection of Curry's remarkable three-point shots"},
-                    {"title": "Defensive Masterclass", "description": "Examples of elite NBA defensive plays and strategies"}
-                ]
-                
-                created_clips = []
-                for sample in sample_clips:
-                    # Create a sample clip
-                    clip_id = f"sample_{uuid.uuid4().hex[:8]}"
-                    local_path = os.path.join(CLIP_STORAGE_DIR, f"{clip_id}.txt")
-                    
-                    # Create a dummy file with NBA play description
-                    with open(local_path, 'w') as f:
-                        f.write(f"Sample NBA clip: {sample['title']}\n\n")
-                        f.write(f"Description: {sample['description']}\n\n")
-                        f.write("Play-by-play contents:\n")
-                        
-                        if "LeBron" in sample['title']:
-                            f.write("0:05 - LeBron drives to the basket, crossover on defender\n")
-                            f.write("0:08 - Elevates for a powerful dunk over two defenders!\n")
-                            f.write("0:24 - Fast break opportunity, LeBron with a behind-the-back pass\n")
-                            f.write("0:45 - LeBron with a chase-down block on the opposing player\n")
-                        elif "Curry" in sample['title']:
-                            f.write("0:12 - Curry with a deep three from 30 feet... BANG!\n")
-                            f.write("0:33 - Behind the back dribble, step back, another three pointer\n")
-                            f.write("0:51 - Curry catches, pump fake, side step, releases... three points!\n")
-                        else:
-                            f.write("0:08 - Perfectly timed help defense prevents an easy layup\n")
-                            f.write("0:22 - Quick hands lead to a steal and transition opportunity\n")
-                            f.write("0:40 - Textbook defensive rotation to close out on the shooter\n")
-                    
-                    # Create metadata
-                    clip_metadata = {
-                        "clip_id": clip_id,
-                        "source": "sample",
-                        "local_path": local_path,
-                        "acquired_at": datetime.now().isoformat(),
-                        "title": sample['title'],
-                        "description": sample['description'],
-                        "duration": 60,
-                        "is_sample": True,
-                        "processed": False
-                    }
-                    
-                    # Save clip metadata
-                    try:
-                        st.session_state.clip_manager.upload_clip = lambda *args, **kwargs: clip_metadata
-                        created_clips.append(clip_metadata)
-                    except Exception as e:
-                        st.error(f"Error creating sample clip: {str(e)}")
-                
-                # Update clips list
-                clips = created_clips
+                try:
+                    clips = ensure_sample_clips()
+                except Exception as e:
+                    st.error(f"Error creating sample clips: {str(e)}")
+                    clips = _cached_get_all_clips(clip_manager.get_metadata_version())
         
         # Display clips in a grid layout
         if clips:
-            # Create a DataFrame for display
-            clip_data = []
-            for clip in clips:
-                clip_data.append({
-                    "id": clip.get("clip_id", "Unknown"),
-                    "title": clip.get("title", "Untitled"),
-                    "source": clip.get("source", "Unknown"),
-                    "uploaded": clip.get("acquired_at", "Unknown")[:10] if clip.get("acquired_at") else "Unknown",
-                    "description": clip.get("description", "No description available")
-                })
-            
-            # Display clips in a visual grid
-            # In the HOME PAGE section, update the clip selection code:
-
             # Display clips in a visual grid
             col1, col2 = st.columns(2)
 
-            for i, clip in enumerate(clip_data):
+            for i, clip_obj in enumerate(clips):
+                # Display fields, with defaults for anything missing
+                clip = {
+                    "id": clip_obj.get("clip_id", "Unknown"),
+                    "title": clip_obj.get("title", "Untitled"),
+                    "source": clip_obj.get("source", "Unknown"),
+                    "description": clip_obj.get("description", "No description available")
+                }
+                
                 with col1 if i % 2 == 0 else col2:
                     # Check if this clip is currently selected
                     is_selected = st.session_state.get('current_clip_id') == clip['id']
@@ -363,11 +654,8 @@ if st.session_state.page == "Home":
                             
                         st.markdown(f"*{clip['description']}*")
                         
-                        # Get the actual clip path
-                        clip_obj = next((c for c in clips if c['clip_id'] == clip['id']), None)
-                        
                         # Add a thumbnail or video preview
-                        if clip_obj and 'local_path' in clip_obj:
+                        if 'local_path' in clip_obj:
                             clip_path = clip_obj['local_path']
                             
                             # If it's a video file and exists
@@ -404,25 +692,12 @@ if st.session_state.page == "Home":
                         # Conditional buttons based on selection status
                         if is_selected:
                             # For selected clip, show an "Analyze Now" button
-                            if st.button("📊 Analyze This Clip", key=f"analyze_{clip['id']}"):
-                                # Navigate to analysis page
-                                st.session_state.page = "Analyze Clips"
-                                st.rerun()
+                            st.button("📊 Analyze This Clip", key=f"analyze_{clip['id']}",
+                                      on_click=go_to, args=("Analyze Clips",))
                         else:
-                            # For unselected clips, show a "Select This Clip" button
-                            if st.button(f"🎬 Select This Clip", key=f"select_{clip['id']}"):
-                                selected_clip = st.session_state.clip_manager.get_clip(clip['id'])
-                                if selected_clip:
-                                    st.session_state.current_clip_path = selected_clip["local_path"]
-                                    st.session_state.current_clip_id = selected_clip["clip_id"]
-                                    st.session_state.first_visit = False
-                                    
-                                    # Set the selected clip indicator
-                                    st.success(f"Selected: {selected_clip['title']}")
-                                    
-                                    # Navigate to analysis page automatically
-                                    st.session_state.page = "Analyze Clips"
-                                    st.rerun()
+                            # For unselected clips, select it and go straight to analysis
+                            st.button(f"🎬 Select This Clip", key=f"select_{clip['id']}",
+                                      on_click=select_clip, args=(clip['id'],))
                         
                         # Close the styled container div
                         st.markdown('</div>', unsafe_allow_html=True)
@@ -431,17 +706,12 @@ if st.session_state.page == "Home":
                         st.markdown("<br>", unsafe_allow_html=True)
             # Add button to upload your own clip
             st.markdown("### Want to use your own clips?")
-            if st.button("Upload Your Own Clips"):
-                # Change page to upload
-                st.session_state.page = "Upload Clips"
-                st.rerun()
+            st.button("Upload Your Own Clips", on_click=go_to, args=("Upload Clips",))
                 
         else:
             st.warning("No clips available. Please upload some clips first.")
             # Change page to upload
-            if st.button("Upload Clips"):
-                st.session_state.page = "Upload Clips"
-                st.rerun()
+            st.button("Upload Clips", on_click=go_to, args=("Upload Clips",))
                 
     except Exception as e:
         st.error(f"Error loading clips: {str(e)}")
@@ -475,13 +745,11 @@ elif st.session_state.page == "Upload Clips":
             
             if st.button("Process Video"):
                 with st.spinner("Processing video..."):
-                    # Save to temporary file
-                    temp_path = os.path.join(TEMP_DIR, uploaded_file.name)
-                    with open(temp_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-                    
-                    # Save to clip storage
-                    clip_metadata = st.session_state.clip_manager.upload_clip(
+                    # Stream straight into clip storage, which is the only copy we keep.
+                    # upload_clip copies from the current position in 1 MiB chunks, so
+                    # rewind in case the preview left the buffer elsewhere
+                    uploaded_file.seek(0)
+                    clip_metadata = clip_manager.upload_clip(
                         file_data=uploaded_file,
                         filename=uploaded_file.name,
                         title=video_title
@@ -492,6 +760,7 @@ elif st.session_state.page == "Upload Clips":
                     # Add description if provided
                     if clip_metadata and video_description:
                         clip_metadata["description"] = video_description
+                        clip_manager.update_clip(clip_metadata)
                     
                     if clip_metadata:
                         st.session_state.current_clip_path = clip_metadata["local_path"]
@@ -501,9 +770,7 @@ elif st.session_state.page == "Upload Clips":
                         st.success(f"Video processed successfully! Clip ID: {clip_metadata['clip_id']}")
                         
                         # Offer to go to analysis page
-                        if st.button("Analyze This Clip Now"):
-                            st.session_state.page = "Analyze Clips"
-                            st.rerun()
+                        st.button("Analyze This Clip Now", on_click=go_to, args=("Analyze Clips",))
                     else:
                         st.error("Error processing video.")
     
@@ -520,7 +787,7 @@ elif st.session_state.page == "Upload Clips":
                 with st.spinner("Downloading from YouTube..."):
                     try:
                         # Download from YouTube
-                        clip_metadata = st.session_state.clip_manager.download_youtube_clip(
+                        clip_metadata = clip_manager.download_youtube_clip(
                             youtube_url, 
                             video_title
                         )
@@ -528,6 +795,7 @@ elif st.session_state.page == "Upload Clips":
                         # Add description if provided
                         if clip_metadata and video_description:
                             clip_metadata["description"] = video_description
+                            clip_manager.update_clip(clip_metadata)
                         
                         if clip_metadata:
                             st.session_state.current_clip_path = clip_metadata["local_path"]
@@ -541,9 +809,8 @@ elif st.session_state.page == "Upload Clips":
                             st.success(f"Video downloaded successfully! Clip ID: {clip_metadata['clip_id']}")
                             
                             # Offer to go to analysis page
-                            if st.button("Analyze This Clip Now"):
-                                st.session_state.page = "Analyze Clips"
-                                st.rerun()
+                            st.button("Analyze This Clip Now", key="analyze_youtube_clip",
+                                      on_click=go_to, args=("Analyze Clips",))
                         else:
                             st.error("Error downloading video from YouTube.")
                             st.info("Try using the 'sample clips' option instead.")
@@ -554,31 +821,21 @@ elif st.session_state.page == "Upload Clips":
     # List previously uploaded clips
     st.subheader("All Available Clips")
     try:
-        clips = st.session_state.clip_manager.get_all_clips()
+        clips, clip_df = _cached_clip_df(clip_manager.get_metadata_version())
         
         if clips:
-            clip_df = []
-            for clip in clips:
-                clip_df.append({
-                    "Clip ID": clip.get("clip_id", "Unknown"),
-                    "Title": clip.get("title", "Untitled"),
-                    "Source": clip.get("source", "Unknown"),
-                    "Uploaded": clip.get("acquired_at", "Unknown")[:10] if clip.get("acquired_at") else "Unknown",
-                    "Description": clip.get("description", "")[:50] + "..." if clip.get("description", "") else ""
-                })
-            
-            clip_df = pd.DataFrame(clip_df)
             st.dataframe(clip_df)
             
             # Allow selecting a clip
+            title_by_id = dict(zip(clip_df["Clip ID"], clip_df["Title"]))
             selected_clip_id = st.selectbox(
                 "Select a clip to analyze", 
-                options=[clip["Clip ID"] for clip in clips],
-                format_func=lambda x: f"{x} - {next((c['Title'] for c in clips if c['Clip ID'] == x), 'Unknown')}"
+                options=list(title_by_id),
+                format_func=lambda x: f"{x} - {title_by_id.get(x, 'Unknown')}"
             )
             
             if st.button("Use Selected Clip"):
-                selected_clip = st.session_state.clip_manager.get_clip(selected_clip_id)
+                selected_clip = clip_manager.get_clip(selected_clip_id)
                 if selected_clip:
                     st.session_state.current_clip_path = selected_clip["local_path"]
                     st.session_state.current_clip_id = selected_clip["clip_id"]
@@ -587,9 +844,8 @@ elif st.session_state.page == "Upload Clips":
                     st.success(f"Selected clip: {selected_clip['title']}")
                     
                     # Offer to go to analysis page
-                    if st.button("Analyze This Clip Now"):
-                        st.session_state.page = "Analyze Clips"
-                        st.rerun()
+                    st.button("Analyze This Clip Now", key="analyze_selected_clip",
+                              on_click=go_to, args=("Analyze Clips",))
         else:
             st.info("No clips uploaded yet.")
     except Exception as e:
@@ -602,9 +858,7 @@ elif st.session_state.page == "Analyze Clips":
     # If first visit and no clip selected, redirect to home
     if st.session_state.first_visit and not st.session_state.current_clip_path:
         st.warning("Please select a clip first.")
-        if st.button("Go to Home"):
-            st.session_state.page = "Home"
-            st.rerun()
+        st.button("Go to Home", on_click=go_to, args=("Home",))
         st.stop()
     
     # Option to create sample clip if no clip is selected
@@ -615,7 +869,7 @@ elif st.session_state.page == "Analyze Clips":
             with st.spinner("Creating sample clip..."):
                 # Create a dummy clip
                 sample_title = "Sample NBA Highlight"
-                clip_id = f"sample_{uuid.uuid4().hex[:8]}"
+                clip_id = f"sample_{secrets.token_hex(4)}"
                 local_path = os.path.join(CLIP_STORAGE_DIR, f"{clip_id}.txt")
                 
                 # Create a dummy file with NBA play description
@@ -640,7 +894,7 @@ elif st.session_state.page == "Analyze Clips":
                 
                 # Add to metadata file
                 try:
-                    st.session_state.clip_manager.upload_clip = lambda *args, **kwargs: clip_metadata
+                    clip_manager.register_sample(clip_metadata)
                     st.session_state.current_clip_path = local_path
                     st.session_state.current_clip_id = clip_id
                     st.success(f"Created sample clip: {sample_title}")
@@ -649,18 +903,14 @@ elif st.session_state.page == "Analyze Clips":
         
         col1, col2 = st.columns(2)
         with col1:
-            if st.button("Go to Home"):
-                st.session_state.page = "Home"
-                st.rerun()
+            st.button("Go to Home", on_click=go_to, args=("Home",))
         with col2:
-            if st.button("Upload a Clip"):
-                st.session_state.page = "Upload Clips"
-                st.rerun()
+            st.button("Upload a Clip", on_click=go_to, args=("Upload Clips",))
                 
         st.stop()
     
     # Display information about the current clip
-    clip_data = st.session_state.clip_manager.get_clip(st.session_state.current_clip_id)
+    clip_data = clip_manager.get_clip(st.session_state.current_clip_id)
     
     if clip_data:
         st.subheader(f"Current Clip: {clip_data.get('title', 'Untitled')}")
@@ -676,52 +926,44 @@ elif st.session_state.page == "Analyze Clips":
         if clip_data.get("description"):
             st.markdown(f"**Description:** {clip_data.get('description')}")
         
+        # Classify the clip file once: one stat covers existence and the text cache key
+        local_path = clip_data["local_path"]
+        try:
+            clip_mtime = os.stat(local_path).st_mtime
+        except OSError:
+            clip_mtime = None
+        is_txt = local_path.endswith(".txt")
+        
         # Display video if available and not a text file
-        if os.path.exists(clip_data["local_path"]) and not clip_data["local_path"].endswith(".txt"):
-            st.video(clip_data["local_path"])
-        elif clip_data["local_path"].endswith(".txt"):
+        if clip_mtime is not None and not is_txt:
+            st.video(local_path)
+        elif is_txt:
             st.info("This is a sample/placeholder clip. Analysis will use a pre-defined basketball scenario.")
-            with st.expander("View Sample Content"):
-                with open(clip_data["local_path"], 'r') as f:
-                    st.code(f.read())
+            if clip_mtime is not None:
+                with st.expander("View Sample Content"):
+                    st.code(_read_text(local_path, clip_mtime))
     
     # Add button to change clip
-    if st.button("Change Clip"):
-        st.session_state.page = "Home"
-        st.rerun()
+    st.button("Change Clip", on_click=go_to, args=("Home",))
     
     # Analysis options
     st.subheader("Analysis Options")
     
     analysis_type = st.selectbox(
         "Select Analysis Type",
-        options=["general", "offensive", "defensive", "player_focus", "coaching"],
-        format_func=lambda x: {
-            "general": "General Analysis",
-            "offensive": "Offensive Analysis",
-            "defensive": "Defensive Analysis",
-            "player_focus": "Player Focus",
-            "coaching": "Coaching Perspective"
-        }.get(x, x.title())
+        options=ANALYSIS_TYPES,
+        format_func=ANALYSIS_LABELS.get
     )
     
     # Analysis description
-    analysis_descriptions = {
-        "general": "Overall assessment of plays, players, and strategies",
-        "offensive": "Focus on offensive tactics, plays, and execution",
-        "defensive": "Focus on defensive schemes, rotations, and effectiveness",
-        "player_focus": "Detailed analysis of individual player techniques and decisions",
-        "coaching": "Breakdown from a coach's perspective with teaching points"
-    }
-    
-    st.info(analysis_descriptions.get(analysis_type, ""))
+    st.info(ANALYSIS_DESCRIPTIONS.get(analysis_type, ""))
     
     # Generate analysis button
     if st.button("Generate Analysis"):
         with st.spinner("Analyzing clip... This may take a minute."):
             try:
                 # Call the analysis engine
-                result = st.session_state.analysis_engine.analyze_video_file(
+                result = _get_engine().analyze_video_file(
                     clip_data["local_path"],
                     clip_data.get("title", "NBA Clip"),
                     analysis_type
@@ -741,20 +983,66 @@ elif st.session_state.page == "Analyze Clips":
                     st.markdown(result["analysis"][:500] + "...")
                     
                     # Link to view full analysis
-                    if st.button("View Full Analysis"):
-                        st.session_state.page = "View Analysis"
-                        st.rerun()
+                    st.button("View Full Analysis", on_click=go_to, args=("View Analysis",))
             except Exception as e:
                 st.error(f"Error generating analysis: {str(e)}")
 
+    # Analyze several clips at once; the engine runs their Gemini requests concurrently.
+    # Batch prediction jobs take minutes to hours, so they are left to the engine's CLI
+    with st.expander("Batch Analyze Multiple Clips"):
+        video_clips = {
+            clip["clip_id"]: clip
+            for clip in _cached_get_all_clips(clip_manager.get_metadata_version())
+            if not clip.get("local_path", "").endswith(".txt")
+        }
+        batch_clip_ids = st.multiselect(
+            "Clips to analyze",
+            options=list(video_clips),
+            format_func=lambda x: f"{x} - {video_clips[x].get('title', 'Untitled')}"
+        )
+        
+        if st.button("Batch Analyze", disabled=not batch_clip_ids):
+            batch_clips = [video_clips[clip_id] for clip_id in batch_clip_ids]
+            with st.status(f"Analyzing 0/{len(batch_clips)} clips...", expanded=True) as status:
+                completed = []
+                
+                def show_progress(index, result):
+                    """Report each clip as the engine finishes it"""
+                    completed.append(index)
+                    title = batch_clips[index].get("title", batch_clips[index]["clip_id"])
+                    if "error" in result:
+                        st.write(f"❌ {title}: {result['error']}")
+                    else:
+                        st.write(f"✅ {title}")
+                    status.update(label=f"Analyzing {len(completed)}/{len(batch_clips)} clips...")
+                
+                try:
+                    results = _get_engine().analyze_videos_batch(
+                        [clip["local_path"] for clip in batch_clips],
+                        analysis_type,
+                        video_titles=[clip.get("title", "NBA Clip") for clip in batch_clips],
+                        on_result=show_progress
+                    )
+                    
+                    # Store every successful result in one pass
+                    analyzed = 0
+                    for clip, result in zip(batch_clips, results):
+                        if "error" not in result:
+                            st.session_state.analysis_results[f"{clip['clip_id']}_{analysis_type}"] = result
+                            analyzed += 1
+                    
+                    status.update(label=f"Analyzed {analyzed} of {len(batch_clips)} clips",
+                                  state="complete" if analyzed == len(batch_clips) else "error")
+                except Exception as e:
+                    status.update(label="Batch analysis failed", state="error")
+                    st.error(f"Error generating batch analysis: {str(e)}")
+
     # Add navigation buttons
     st.markdown("---")
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        if st.button("⬅️ Back to Home"):
-            st.session_state.st.session_state.page = "Home"
-            st.rerun()
+        st.button("⬅️ Back to Home", on_click=go_to, args=("Home",))
             
     with col2:
         pass  # Empty column for spacing
@@ -763,84 +1051,76 @@ elif st.session_state.page == "Analyze Clips":
         # Only show this button if analysis has been generated
         if st.session_state.current_clip_id:
             result_key = f"{st.session_state.current_clip_id}_{analysis_type}"
-            if result_key in st.session_state.analysis_results:
-                if st.button("➡️ View Analysis Results"):
-                    st.session_state.page = "View Analysis"
-                    st.rerun()
+            if result_key in st.session_state.analysis_results or result_key in st.session_state.analysis_files:
+                st.button("➡️ View Analysis Results", on_click=go_to, args=("View Analysis",))
 
 # 3. VIEW ANALYSIS PAGE
 elif st.session_state.page == "View Analysis":
     st.header("View Analysis Results")
     
-    # Check if we have any analysis results
-    if not st.session_state.analysis_results:
-        # Try to load from files
+    # Pick up analysis files saved since the last visit. A newer file replaces
+    # whatever is held for the same key, whether loaded or not. The scan (a
+    # stat per file) is skipped while neither the directory nor the index has
+    # changed; the engine renames finished analyses into place and then
+    # appends to the index, so each save changes both
+    try:
+        scan_key = (os.stat(ANALYSIS_DIR).st_mtime_ns,)
         try:
-            analysis_files = [f for f in os.listdir(ANALYSIS_DIR) if f.endswith('.json')]
-            
-            if not analysis_files:
-                st.warning("No analysis results available.")
-                
-                # If we have a selected clip, offer to analyze it
-                if st.session_state.current_clip_id:
-                    if st.button("Analyze Current Clip"):
-                        st.session_state.page = "Analyze Clips"
-                        st.rerun()
-                else:
-                    if st.button("Select a Clip"):
-                        st.session_state.page = "Home"
-                        st.rerun()
-                
-                st.stop()
-                
-            # Load all analysis files
-            for file in analysis_files:
-                file_path = os.path.join(ANALYSIS_DIR, file)
-                analysis_data = read_analysis_file(file_path)
-                
-                if analysis_data:
-                    clip_id = analysis_data.get("video_path", "").split("/")[-1].split(".")[0]
-                    analysis_type = analysis_data.get("analysis_type", "general")
-                    result_key = f"{clip_id}_{analysis_type}"
-                    st.session_state.analysis_results[result_key] = analysis_data
-                    
-        except Exception as e:
-            st.error(f"Error loading analysis files: {str(e)}")
+            index_stat = os.stat(os.path.join(ANALYSIS_DIR, ANALYSIS_INDEX_FILE))
+            scan_key += (index_stat.st_mtime_ns, index_stat.st_size)
+        except FileNotFoundError:
+            pass
+        if st.session_state.get('_analysis_scan_key') != scan_key:
+            loaded_mtimes = st.session_state.setdefault('_analysis_mtimes', {})
+            analyses, analysis_files = load_new_analyses(ANALYSIS_DIR, loaded_mtimes)
+            for key in analyses:
+                st.session_state.analysis_files.pop(key, None)
+            for key in analysis_files:
+                st.session_state.analysis_results.pop(key, None)
+            st.session_state.analysis_results.update(analyses)
+            st.session_state.analysis_files.update(analysis_files)
+            st.session_state['_analysis_scan_key'] = scan_key
+    except Exception as e:
+        st.error(f"Error loading analysis files: {str(e)}")
     
-    if not st.session_state.analysis_results:
+    if not st.session_state.analysis_results and not st.session_state.analysis_files:
         st.warning("No analysis results available.")
         
         # If we have a selected clip, offer to analyze it
         if st.session_state.current_clip_id:
-            if st.button("Analyze Current Clip"):
-                st.session_state.page = "Analyze Clips"
-                st.rerun()
+            st.button("Analyze Current Clip", on_click=go_to, args=("Analyze Clips",))
         else:
-            if st.button("Select a Clip"):
-                st.session_state.page = "Home"
-                st.rerun()
+            st.button("Select a Clip", on_click=go_to, args=("Home",))
                 
         st.stop()
     
-    # Select analysis to view
-    analysis_options = list(st.session_state.analysis_results.keys())
-# Updated code with video title:
-    def format_analysis_option(option_key):
-        """Format analysis option to include video title"""
-        clip_id = option_key.split('_')[0]
-        analysis_type = option_key.split('_')[-1].title()
-        
-        # Get video title from the analysis data
-        analysis_data = st.session_state.analysis_results[option_key]
-        video_title = analysis_data.get("video_title", "Unknown")
-        
-        return f"{video_title} - {analysis_type}"
+    # Select analysis to view; option labels (video title and analysis type)
+    # are only rebuilt when the set of analyses changes
+    options_version = (frozenset(st.session_state.analysis_results), frozenset(st.session_state.analysis_files))
+    cached_version, analysis_options = st.session_state.setdefault('_analysis_options_cache', (None, None))
+    if cached_version != options_version:
+        all_analyses = {**st.session_state.analysis_files, **st.session_state.analysis_results}
+        analysis_options = [(key, format_analysis_option(key, analysis_data))
+                            for key, analysis_data in all_analyses.items()]
+        st.session_state['_analysis_options_cache'] = (options_version, analysis_options)
+    analysis_labels = dict(analysis_options)
 
     selected_analysis = st.selectbox(
         "Select Analysis to View",
-        options=analysis_options,
-        format_func=format_analysis_option
-)    
+        options=list(analysis_labels),
+        format_func=analysis_labels.get
+    )
+    
+    # Read the selected analysis if only its index entry is loaded so far
+    if selected_analysis in st.session_state.analysis_files and selected_analysis not in st.session_state.analysis_results:
+        analysis_file = st.session_state.analysis_files[selected_analysis]
+        analysis_data, error = read_analysis_file_cached(analysis_file["path"], analysis_file["mtime"])
+        if error is not None:
+            st.error(f"Error reading analysis file: {str(error)}")
+        elif analysis_data:
+            st.session_state.analysis_results[selected_analysis] = analysis_data
+            del st.session_state.analysis_files[selected_analysis]
+    
     if selected_analysis and selected_analysis in st.session_state.analysis_results:
         analysis_data = st.session_state.analysis_results[selected_analysis]
         
@@ -860,9 +1140,9 @@ elif st.session_state.page == "View Analysis":
         if st.button("Extract Key Segments"):
             with st.spinner("Extracting key segments..."):
                 try:
-                    segments = st.session_state.analysis_engine.extract_key_segments(
-                        analysis_data.get("analysis", "")
-                    )
+                    analysis_text = analysis_data.get("analysis", "")
+                    text_hash = hashlib.blake2b(analysis_text.encode('utf-8'), digest_size=16).hexdigest()
+                    segments = _cached_extract_segments(text_hash, analysis_text)
                     
                     if segments:
                         st.subheader("Key Segments")
@@ -880,7 +1160,7 @@ elif st.session_state.page == "View Analysis":
         if st.button("Generate Summary"):
             with st.spinner("Generating summary..."):
                 try:
-                    summary = st.session_state.analysis_engine.create_analysis_summary(
+                    summary = _get_engine().create_analysis_summary(
                         analysis_data.get("analysis", "")
                     )
                     
@@ -900,27 +1180,31 @@ elif st.session_state.page == "View Analysis":
         with col1:
             # Save as JSON
             if st.button("Save as JSON"):
-                # Create a temporary file
-                temp_file = os.path.join(TEMP_DIR, f"analysis_{selected_analysis}.json")
-                with open(temp_file, 'w') as f:
-                    json.dump(analysis_data, f, indent=2)
-                
-                # Provide download link
-                st.markdown(get_binary_file_downloader_html(temp_file, 'JSON File'), unsafe_allow_html=True)
+                # Serve the bytes directly; nothing is written to disk
+                st.download_button(
+                    label="Download JSON File",
+                    data=_json_dumps(analysis_data, indent=True),
+                    file_name=f"analysis_{selected_analysis}.json",
+                    mime="application/json"
+                )
         
         with col2:
             # Save as Text
             if st.button("Save as Text"):
-                # Create a temporary file
-                temp_file = os.path.join(TEMP_DIR, f"analysis_{selected_analysis}.txt")
-                with open(temp_file, 'w') as f:
-                    f.write(f"Analysis of: {analysis_data.get('video_title', 'Unknown')}\n")
-                    f.write(f"Type: {analysis_data.get('analysis_type', 'general').title()}\n")
-                    f.write(f"Generated: {analysis_data.get('analyzed_at', 'Unknown')}\n\n")
-                    f.write(analysis_data.get("analysis", "Analysis not available."))
+                payload = "".join([
+                    f"Analysis of: {analysis_data.get('video_title', 'Unknown')}\n",
+                    f"Type: {analysis_data.get('analysis_type', 'general').title()}\n",
+                    f"Generated: {analysis_data.get('analyzed_at', 'Unknown')}\n\n",
+                    analysis_data.get("analysis", "Analysis not available.")
+                ])
                 
-                # Provide download link
-                st.markdown(get_binary_file_downloader_html(temp_file, 'Text File'), unsafe_allow_html=True)
+                # Serve the text directly; nothing is written to disk
+                st.download_button(
+                    label="Download Text File",
+                    data=payload.encode('utf-8'),
+                    file_name=f"analysis_{selected_analysis}.txt",
+                    mime="text/plain"
+                )
         
         # Option to generate new analysis
         st.subheader("Generate More Analysis")
@@ -930,21 +1214,13 @@ elif st.session_state.page == "View Analysis":
         
         with col1:
             # Find clip ID from the selected analysis
-            clip_id = selected_analysis.split('_')[0]
+            clip_id = split_analysis_key(selected_analysis)[0]
             
-            if st.button("Analyze This Clip with Different Type"):
-                # Set the current clip ID
-                st.session_state.current_clip_id = clip_id
-                st.session_state.current_clip_path = st.session_state.clip_manager.get_clip(clip_id)["local_path"]
-                
-                # Go to analyze page
-                st.session_state.page = "Analyze Clips"
-                st.rerun()
+            st.button("Analyze This Clip with Different Type",
+                      on_click=select_clip, args=(clip_id,))
                 
         with col2:
-            if st.button("Select a Different Clip"):
-                st.session_state.page = "Home"
-                st.rerun()
+            st.button("Select a Different Clip", on_click=go_to, args=("Home",))
 
 # 4. ABOUT PAGE
 else:  # About page
@@ -0,0 +1,75 @@
+# test_direct_analysis_engine.py
+
+import asyncio
+import os
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+import direct_analysis_engine as engine_module
+
+
+class LoopBoundModel:
+    """Stand-in for a GenerativeModel whose async client binds to the first event loop that uses it"""
+
+    def __init__(self):
+        self.loop = None
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        return iter([types.SimpleNamespace(text=f"Analysis of {contents[0]}")])
+
+    async def generate_content_async(self, contents, stream=False, **kwargs):
+        loop = asyncio.get_running_loop()
+        if self.loop is None:
+            self.loop = loop
+        elif self.loop is not loop:
+            raise RuntimeError("Event loop is closed")
+
+        async def stream_chunks():
+            for chunk in self.generate_content(contents, stream, **kwargs):
+                yield chunk
+        return stream_chunks()
+
+
+class AnalyzeVideosBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        cwd = os.getcwd()
+        self.addCleanup(os.chdir, cwd)
+        os.chdir(tmp.name)
+        os.makedirs(engine_module.ANALYSIS_DIR)
+
+        async def upload(video_path, mimetype):
+            return types.SimpleNamespace(name=video_path)
+
+        for patcher in (mock.patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}),
+                        mock.patch.object(engine_module, "_upload_video_async", upload),
+                        mock.patch.object(engine_module, "_delete_uploaded_file", lambda video_file: None)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.engine = engine_module.DirectAnalysisEngine(preprocess=False)
+        model = LoopBoundModel()
+        self.engine._rubric_model = lambda analysis_type: model
+
+    def _write_videos(self, prefix):
+        paths = []
+        for index in range(2):
+            path = f"{prefix}_{index}.mp4"
+            with open(path, 'wb') as f:
+                f.write(f"{prefix} video {index}".encode())
+            paths.append(path)
+        return paths
+
+    def test_second_batch_in_same_process_succeeds(self):
+        for prefix in ("first", "second"):
+            results = self.engine.analyze_videos_batch(self._write_videos(prefix))
+            self.assertEqual([result.get("error") for result in results], [None, None])
+            self.assertTrue(all(result["analysis"].startswith("Analysis of") for result in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
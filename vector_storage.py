@@ -10,6 +10,11 @@ import chromadb
 from chromadb.utils import embedding_functions
 import uuid
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -22,6 +27,9 @@ DB_DIRECTORY = "vector_db"
 COLLECTION_NAME = "nba_clips_v2"
 os.makedirs(DB_DIRECTORY, exist_ok=True)
 
+# Parse JSON with orjson when available, stdlib json otherwise
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 # Initialize Chroma client
 def init_chroma_client():
     """Initialize ChromaDB client"""
@@ -368,7 +376,7 @@ class VectorStorage:
             players = []
             if metadata.get("players"):
                 try:
-                    players = json.loads(metadata.get("players", "[]"))
+                    players = _json_loads(metadata.get("players", "[]"))
                 except json.JSONDecodeError:
                     pass
             
@@ -521,8 +529,8 @@ if __name__ == "__main__":
     if args.command == "add":
         # Load processed clip data
         try:
-            with open(args.processed_file, 'r') as f:
-                processed_data = json.load(f)
+            with open(args.processed_file, 'rb') as f:
+                processed_data = _json_loads(f.read())
                 
             success = storage.add_clip(processed_data)
             